@@ -0,0 +1,342 @@
+import argparse
+import atexit
+import glob
+import hashlib
+import itertools
+import json
+import logging
+import math
+import os
+import queue
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from tracing import current_trace_id
+
+# "file" writes compressed columnar segments under AUDIT_DIR; "timescaledb" batches into the execution_audit table
+AUDIT_SINK = os.getenv("AUDIT_SINK", "file")
+AUDIT_DIR = os.getenv("AUDIT_DIR", "audit")
+BATCH_SIZE = 256
+FLUSH_INTERVAL = 1.0
+QUEUE_SIZE = 10_000
+
+COLUMNS = ['ts', 'kind', 'symbol', 'trace_id', 'payload']
+
+
+def snapshot_hash(obj) -> str:
+    """Stable short hash of a JSON-able input snapshot, to link decisions to the exact data they saw."""
+    canonical = json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def _finite(obj):
+    # NaN/inf become null: JSONB rejects them, and one bad float must not cost the whole batch
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    return obj
+
+
+def _dumps(payload: dict) -> str:
+    try:
+        return json.dumps(payload, default=str, allow_nan=False)
+    except ValueError as e:
+        if "Out of range float" not in str(e):
+            raise
+        return json.dumps(_finite(payload), default=str, allow_nan=False)
+
+
+class FileSink:
+    """
+    Append-only columnar segments: one compressed .npz per batch, one array per column.
+    File names carry the batch's first/last timestamps so time-range queries skip whole
+    segments, and readers load only the columns they filter on.
+    """
+
+    def __init__(self, directory: str = AUDIT_DIR):
+        self.directory = directory
+        self._seq = itertools.count()
+
+    def write(self, batch: List[dict]):
+        os.makedirs(self.directory, exist_ok=True)
+        ts = np.array([r['ts'] for r in batch], dtype=np.float64)
+        columns = {'ts': ts}
+        for name in COLUMNS[1:]:
+            columns[name] = np.array([r[name] or "" for r in batch], dtype=str)
+        name = f"audit-{int(ts.min() * 1000)}-{int(ts.max() * 1000)}-{os.getpid()}-{next(self._seq)}"
+        tmp = os.path.join(self.directory, f".{name}.tmp.npz")
+        np.savez_compressed(tmp, **columns)
+        os.replace(tmp, os.path.join(self.directory, f"{name}.npz"))
+
+
+class TimescaleSink:
+    """Batched inserts into execution_audit (one multi-row INSERT per batch, one connection)."""
+
+    def __init__(self):
+        self.conn = None
+
+    def _connect(self):
+        from timescaledb_tools import get_timescaledb_conn
+        self.conn = get_timescaledb_conn()
+        cur = self.conn.cursor()
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS execution_audit (
+                ts DOUBLE PRECISION NOT NULL,
+                kind TEXT NOT NULL,
+                symbol TEXT,
+                trace_id TEXT,
+                payload JSONB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS execution_audit_trace_idx ON execution_audit (trace_id, ts);
+            CREATE INDEX IF NOT EXISTS execution_audit_symbol_idx ON execution_audit (symbol, ts);
+        ''')
+        self.conn.commit()
+        cur.close()
+
+    def write(self, batch: List[dict]):
+        from psycopg2.extras import execute_values
+        if self.conn is None or self.conn.closed:
+            self._connect()
+        cur = self.conn.cursor()
+        try:
+            execute_values(cur, "INSERT INTO execution_audit (ts, kind, symbol, trace_id, payload) VALUES %s",
+                           [tuple(r[name] for name in COLUMNS) for r in batch])
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+class AuditLog:
+    """
+    Append-only log of decisions, their input snapshots, order legs and exchange responses.
+    log() only enqueues; a background thread writes batches to the sink, so the order path
+    never waits on disk or the database. When the queue is full, events are dropped and counted.
+    """
+
+    def __init__(self, sink=None, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL,
+                 queue_size: int = QUEUE_SIZE):
+        self.sink = sink or FileSink()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.rejected = 0  # Events whose payload could not be serialized
+        self.failed_batches = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="audit-log", daemon=True)
+        self._thread.start()
+
+    def log(self, kind: str, symbol: Optional[str] = None, trace_id: Optional[str] = None, **payload):
+        # Serialize now: the caller may mutate its dicts once this returns, and a bad payload
+        # must fail here, counted, rather than on the writer thread
+        try:
+            document = _dumps(payload)
+        except Exception as e:
+            self.rejected += 1
+            logging.error(f"Audit log: cannot serialize {kind} event for {symbol}: {e}")
+            return
+        event = {
+            'ts': time.time(),
+            'kind': kind,
+            'symbol': symbol,
+            'trace_id': trace_id or current_trace_id(),
+            'payload': document,
+        }
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def _write(self, batch: List[dict]):
+        try:
+            self.sink.write(batch)
+        except Exception as e:
+            self.failed_batches += 1
+            logging.error(f"Audit log: failed to write {len(batch)} events: {e}")
+
+    def _run(self):
+        batch, deadline, stopping = [], None, False
+        while not stopping:
+            try:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    event = self._queue.get(timeout=timeout)
+                    if event is None:
+                        stopping = True
+                    else:
+                        batch.append(event)
+                        deadline = deadline or time.monotonic() + self.flush_interval
+                except queue.Empty:
+                    pass
+                if batch and (stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                    self._write(batch)
+                    batch, deadline = [], None
+            except Exception as e:
+                # Nothing may end the writer thread: later events would pile up and be dropped silently
+                logging.exception(f"Audit log: writer error, discarding {len(batch)} events: {e}")
+                self.failed_batches += 1
+                batch, deadline = [], None
+
+    def close(self):
+        """Flush everything queued so far and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+_audit_log = None
+_audit_lock = threading.Lock()
+
+
+def get_audit_log() -> AuditLog:
+    global _audit_log
+    with _audit_lock:
+        if _audit_log is None:
+            _audit_log = AuditLog(TimescaleSink() if AUDIT_SINK == "timescaledb" else FileSink())
+            atexit.register(_audit_log.close)
+        return _audit_log
+
+
+def audit(kind: str, symbol: Optional[str] = None, **payload):
+    """Record an event on the process-wide audit log; never blocks or raises."""
+    try:
+        get_audit_log().log(kind, symbol, **payload)
+    except Exception as e:
+        logging.error(f"Audit log unavailable: {e}")
+
+
+def _segments(directory: str, start: Optional[float], end: Optional[float]):
+    for path in sorted(glob.glob(os.path.join(directory, "audit-*.npz"))):
+        first_ms, last_ms = (int(part) for part in os.path.basename(path).split("-")[1:3])
+        if (start is not None and last_ms < start * 1000) or (end is not None and first_ms > end * 1000):
+            continue
+        yield path
+
+
+def _event(ts, kind, symbol, trace_id, payload) -> dict:
+    # The payload stays nested so its keys can never shadow the event columns
+    return {
+        'ts': float(ts),
+        'kind': str(kind),
+        'symbol': str(symbol) if symbol else None,
+        'trace_id': str(trace_id) if trace_id else None,
+        'payload': json.loads(payload) if isinstance(payload, str) else payload,
+    }
+
+
+def _query_files(directory, kind, symbol, trace_id, start, end, limit) -> List[dict]:
+    events = []
+    for path in _segments(directory, start, end):
+        with np.load(path) as segment:
+            ts = segment['ts']
+            mask = np.ones(len(ts), dtype=bool)
+            if start is not None:
+                mask &= ts >= start
+            if end is not None:
+                mask &= ts < end
+            for column, value in (('kind', kind), ('symbol', symbol), ('trace_id', trace_id)):
+                if value is not None and mask.any():
+                    mask &= segment[column] == value
+            if not mask.any():
+                continue
+            rows = {name: segment[name][mask] for name in COLUMNS}
+        events.extend(_event(*(rows[name][i] for name in COLUMNS)) for i in range(int(mask.sum())))
+    events.sort(key=lambda e: e['ts'])
+    return events[-limit:] if limit else events
+
+
+def audit_query(kind=None, symbol=None, trace_id=None, start=None, end=None, limit=None):
+    """SQL and parameters for the execution_audit table; rows come back newest first."""
+    where, params = [], []
+    for column, value in (('kind', kind), ('symbol', symbol), ('trace_id', trace_id)):
+        if value is not None:
+            where.append(f"{column} = %s")
+            params.append(value)
+    if start is not None:
+        where.append("ts >= %s")
+        params.append(float(start))
+    if end is not None:
+        where.append("ts < %s")
+        params.append(float(end))
+    sql = "SELECT ts, kind, symbol, trace_id, payload FROM execution_audit"
+    if where:
+        sql += f" WHERE {' AND '.join(where)}"
+    sql += " ORDER BY ts DESC"
+    if limit:
+        sql += " LIMIT %s"
+        params.append(int(limit))
+    return sql, params
+
+
+def _query_timescaledb(conn, kind, symbol, trace_id, start, end, limit) -> List[dict]:
+    own_conn = conn is None
+    if own_conn:
+        from timescaledb_tools import get_timescaledb_conn
+        conn = get_timescaledb_conn()
+    try:
+        cur = conn.cursor()
+        cur.execute(*audit_query(kind, symbol, trace_id, start, end, limit))
+        rows = cur.fetchall()
+        cur.close()
+    finally:
+        if own_conn:
+            conn.close()
+    return [_event(*row) for row in reversed(rows)]
+
+
+def query(directory: str = AUDIT_DIR, kind: Optional[str] = None, symbol: Optional[str] = None,
+          trace_id: Optional[str] = None, start: Optional[float] = None, end: Optional[float] = None,
+          limit: Optional[int] = None, sink: str = AUDIT_SINK, conn=None) -> List[dict]:
+    """
+    Events matching every given filter, oldest first, from the file segments or (sink="timescaledb")
+    the execution_audit table. Each event is {ts, kind, symbol, trace_id, payload}.
+    """
+    if sink == "timescaledb":
+        return _query_timescaledb(conn, kind, symbol, trace_id, start, end, limit)
+    return _query_files(directory, kind, symbol, trace_id, start, end, limit)
+
+
+def replay(trace_id: str, directory: str = AUDIT_DIR, sink: str = AUDIT_SINK, conn=None) -> dict:
+    """
+    One decision's timeline: the input snapshots it read (with hashes), the orders it sent
+    and their exchange results, and the final output, in the order they happened.
+    """
+    events = query(directory, trace_id=trace_id, sink=sink, conn=conn)
+    return {
+        'trace_id': trace_id,
+        'symbol': next((e['symbol'] for e in events if e['symbol']), None),
+        'inputs': [e for e in events if e['kind'] == 'input'],
+        'orders': [e for e in events if e['kind'].startswith('order')],
+        'decision': next((e for e in reversed(events) if e['kind'] == 'decision'), None),
+        'events': events,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the execution audit log.")
+    parser.add_argument("--dir", default=AUDIT_DIR)
+    parser.add_argument("--sink", choices=["file", "timescaledb"], default=AUDIT_SINK,
+                        help="where events were written (default: AUDIT_SINK)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    listing = sub.add_parser("list", help="list events")
+    listing.add_argument("--kind")
+    listing.add_argument("--symbol")
+    listing.add_argument("--since-minutes", type=float)
+    listing.add_argument("--limit", type=int, default=50)
+    trace = sub.add_parser("replay", help="timeline of one decision")
+    trace.add_argument("trace_id")
+    args = parser.parse_args()
+    if args.command == "list":
+        start = time.time() - args.since_minutes * 60 if args.since_minutes else None
+        for event in query(args.dir, args.kind, args.symbol, start=start, limit=args.limit, sink=args.sink):
+            print(json.dumps(event, default=str))
+    else:
+        print(json.dumps(replay(args.trace_id, args.dir, sink=args.sink), indent=2, default=str))
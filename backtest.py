@@ -0,0 +1,280 @@
+import argparse
+import logging
+import time
+from dataclasses import dataclass, asdict
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from trade_utils import indicator_frame
+
+# Candidate signals are simulated in blocks so the (signals x max_hold) windows stay small
+CHUNK_SIZE = 2048
+
+
+@dataclass
+class StrategyParams:
+    """TechnicalAnalyst decision-logic thresholds plus the indicator lengths they depend on."""
+    adx_min: float = 20.0
+    adx_strong: float = 25.0
+    rsi_buy: float = 45.0
+    rsi_sell: float = 55.0
+    sl_atr: float = 1.5
+    tp_atr: float = 2.0
+    confirm_weight: float = 8.0
+    conflict_weight: float = 5.0
+    min_confidence: float = 45.0  # Medium or better
+    vwap_max_dist_pct: float = 0.5
+    ema_fast: int = 8
+    ema_slow: int = 21
+    bb_length: int = 20
+    bb_std: float = 2.0
+    swing_n: int = 10
+
+    def indicator_params(self) -> dict:
+        return {
+            'ema_fast': self.ema_fast,
+            'ema_slow': self.ema_slow,
+            'bb_length': self.bb_length,
+            'bb_std': self.bb_std,
+            'swing_n': self.swing_n,
+        }
+
+
+@dataclass
+class BacktestConfig:
+    maker_fee: float = 0.0002    # limit entry
+    taker_fee: float = 0.00055   # TP/SL trigger orders fill at market
+    slippage_bps: float = 2.0    # applied to market exits
+    entry_timeout: int = 5       # bars a limit entry may rest before it is dropped
+    max_hold: int = 1440         # bars before a position is closed at market
+    notional: float = 1000.0     # quote size per trade
+    capital: float = 1000.0      # starting equity for drawdown %
+
+
+def load_candles(path: str) -> pd.DataFrame:
+    """Load OHLCV saved by fetch_core_5m.py (Date index, open/high/low/close/volume)."""
+    candles = pd.read_csv(path, parse_dates=['Date'], index_col='Date')
+    return candles[['open', 'high', 'low', 'close', 'volume']].astype(float).sort_index()
+
+
+def resample_ohlcv(candles: pd.DataFrame, rule: str) -> pd.DataFrame:
+    bars = candles.resample(rule, label='left', closed='left').agg(
+        {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'})
+    return bars.dropna()
+
+
+def align_closed(frame: pd.DataFrame, period: pd.Timedelta, index: pd.DatetimeIndex, bar: pd.Timedelta) -> pd.DataFrame:
+    """Project higher-timeframe rows onto `index`, using only bars that had closed by each base bar's close."""
+    closed = frame.set_axis(frame.index + period)
+    return closed.reindex(index + bar, method='ffill').set_axis(index)
+
+
+def _trend(frame: pd.DataFrame, adx_min: float) -> np.ndarray:
+    bull = (frame['ema'] > frame['sma']) & (frame['ema_slope'] > 0) & (frame['macdhist'] > 0) & (frame['adx'] >= adx_min)
+    bear = (frame['ema'] < frame['sma']) & (frame['ema_slope'] < 0) & (frame['macdhist'] < 0) & (frame['adx'] >= adx_min)
+    return np.where(bull, 1, np.where(bear, -1, 0))
+
+
+def generate_signals(candles: pd.DataFrame, params: StrategyParams = None, frames: dict = None) -> pd.DataFrame:
+    """
+    Vectorized TechnicalAnalyst rules over 1m candles: 5m/15m trend filter, 1m entry
+    timing, VWAP gate, deterministic confidence score and ATR-based SL/TP.
+    Candle-pattern contradictions are not scored.
+    """
+    params = params or StrategyParams()
+    if frames is None:
+        frames = timeframe_frames(candles, params)
+    f1, f5, f15 = frames['1m'], frames['5m'], frames['15m']
+    close, high, low = candles['close'], candles['high'], candles['low']
+
+    t5, t15 = _trend(f5, params.adx_min), _trend(f15, params.adx_min)
+    trend = np.where(t5 == t15, t5, 0)
+
+    cross_up = (f1['ema_cross'] == 1).rolling(3, min_periods=1).max().astype(bool)
+    cross_down = (f1['ema_cross'] == -1).rolling(3, min_periods=1).max().astype(bool)
+    k, d = f1['stoch_k'], f1['stoch_d']
+    stoch_up = ((k > d) & (k.shift(1) <= d.shift(1))).astype(int).rolling(3, min_periods=1).max().astype(bool)
+    stoch_down = ((k < d) & (k.shift(1) >= d.shift(1))).astype(int).rolling(3, min_periods=1).max().astype(bool)
+
+    buy = (trend == 1) & ((low <= f1['bb_lower']) | cross_up) & (f1['rsi'] < params.rsi_buy)
+    sell = (trend == -1) & ((high >= f1['bb_upper']) | cross_down) & (f1['rsi'] > params.rsi_sell)
+    vwap_ok = (close - f1['vwap']).abs() / f1['vwap'] * 100 <= params.vwap_max_dist_pct
+    side = np.where(buy & vwap_ok, 1, np.where(sell & vwap_ok, -1, 0))
+
+    obv_agrees = np.sign(f1['obv_slope']) == side
+    confirms = (
+        1  # trend match
+        + (np.sign(f5['ema_slope']) == side).astype(int)
+        + (np.sign(f5['macdhist']) == side).astype(int)
+        + obv_agrees.astype(int)
+        + np.where(side == 1, stoch_up, stoch_down).astype(int)
+    )
+    divergence_penalty = np.where(obv_agrees, 0.0, np.where(f1['adx'] >= params.adx_strong, 0.5, 1.0))
+    conflicts = (
+        (f1['adx'] < params.adx_min).astype(int)
+        + divergence_penalty
+        # Neutral RSI band between the entry thresholds, so swept thresholds move it too
+        + f1['rsi'].between(min(params.rsi_buy, params.rsi_sell), max(params.rsi_buy, params.rsi_sell)).astype(int)
+    )
+    confidence = np.clip(55 + params.confirm_weight * confirms - params.conflict_weight * conflicts, 0, 100)
+    side = np.where(confidence >= params.min_confidence, side, 0)
+
+    atr15 = f15['atr']
+    stop_loss = close - side * params.sl_atr * atr15
+    band_distance = np.where(side == 1, f1['bb_upper'] - close, close - f1['bb_lower'])
+    tp_distance = params.tp_atr * atr15
+    tp_distance = np.where(band_distance > 0, np.minimum(tp_distance, band_distance), tp_distance)
+    take_profit = close + side * tp_distance
+    return pd.DataFrame({
+        'signal': side,
+        'entry': close,
+        'stop_loss': stop_loss,
+        'take_profit': take_profit,
+        'confidence': confidence,
+    }, index=candles.index)
+
+
+def timeframe_frames(candles: pd.DataFrame, params: StrategyParams = None) -> dict:
+    """Indicator frames for 1m and the closed 5m/15m bars aligned onto the 1m index."""
+    params = params or StrategyParams()
+    indicator_params = params.indicator_params()
+    bar = candles.index[1] - candles.index[0]
+    frames = {'1m': indicator_frame(candles, indicator_params, include_cci=False)}
+    for tf, rule in (('5m', '5min'), ('15m', '15min')):
+        higher = indicator_frame(resample_ohlcv(candles, rule), indicator_params, include_cci=False)
+        frames[tf] = align_closed(higher, pd.Timedelta(rule), candles.index, bar)
+    return frames
+
+
+def _padded(values: np.ndarray, pad: int) -> np.ndarray:
+    return np.concatenate([values, np.full(pad, np.nan)])
+
+
+def simulate(candles: pd.DataFrame, signals: pd.DataFrame, config: BacktestConfig = None) -> pd.DataFrame:
+    """
+    Fill limit entries and TP/SL triggers bar by bar in vectorized blocks. When SL and TP
+    trigger in the same bar the stop is assumed first. One position at a time.
+    """
+    config = config or BacktestConfig()
+    n = len(candles)
+    pad = config.max_hold + config.entry_timeout + 1
+    open_ = _padded(candles['open'].to_numpy(float), pad)
+    high = _padded(candles['high'].to_numpy(float), pad)
+    low = _padded(candles['low'].to_numpy(float), pad)
+    close = _padded(candles['close'].to_numpy(float), pad)
+    side_all = signals['signal'].to_numpy()
+    cand = np.flatnonzero((side_all != 0) & np.isfinite(signals['stop_loss'].to_numpy()))
+
+    high_entry = sliding_window_view(high, config.entry_timeout)
+    low_entry = sliding_window_view(low, config.entry_timeout)
+    high_hold = sliding_window_view(high, config.max_hold)
+    low_hold = sliding_window_view(low, config.max_hold)
+
+    blocks = []
+    for start in range(0, len(cand), CHUNK_SIZE):
+        idx = cand[start:start + CHUNK_SIZE]
+        side = side_all[idx]
+        entry = signals['entry'].to_numpy()[idx]
+        sl = signals['stop_loss'].to_numpy()[idx]
+        tp = signals['take_profit'].to_numpy()[idx]
+
+        # Limit entry rests on the following bars
+        touched = np.where(side[:, None] == 1, low_entry[idx + 1] <= entry[:, None], high_entry[idx + 1] >= entry[:, None])
+        filled = touched.any(axis=1)
+        fill_idx = idx + 1 + touched.argmax(axis=1)
+
+        # Protective triggers from the fill bar on
+        lows, highs = low_hold[fill_idx], high_hold[fill_idx]
+        sl_hit = np.where(side[:, None] == 1, lows <= sl[:, None], highs >= sl[:, None])
+        tp_hit = np.where(side[:, None] == 1, highs >= tp[:, None], lows <= tp[:, None])
+        sl_first = np.where(sl_hit.any(axis=1), sl_hit.argmax(axis=1), config.max_hold)
+        tp_first = np.where(tp_hit.any(axis=1), tp_hit.argmax(axis=1), config.max_hold)
+        offset = np.minimum(np.minimum(sl_first, tp_first), config.max_hold - 1)
+        exit_idx = np.minimum(fill_idx + offset, n - 1)
+        reason = np.where(sl_first <= tp_first, 'sl', 'tp')
+        reason = np.where((sl_first == config.max_hold) & (tp_first == config.max_hold), 'timeout', reason)
+        reason = np.where(fill_idx + offset > n - 1, 'end', reason)
+
+        exit_open = open_[exit_idx]
+        # A gap through the stop fills at the open, not at the trigger
+        sl_price = np.where(side == 1, np.minimum(sl, exit_open), np.maximum(sl, exit_open))
+        sl_price = np.where(exit_idx == fill_idx, sl, sl_price)
+        exit_price = np.select([reason == 'sl', reason == 'tp'], [sl_price, tp], close[exit_idx])
+        exit_price = exit_price * (1 - side * config.slippage_bps / 10000)
+        blocks.append(pd.DataFrame({
+            'signal_idx': idx, 'side': side, 'filled': filled, 'fill_idx': fill_idx,
+            'exit_idx': exit_idx, 'entry': entry, 'exit': exit_price, 'reason': reason,
+        }))
+    if not blocks:
+        return pd.DataFrame(columns=['signal_idx', 'side', 'filled', 'fill_idx', 'exit_idx', 'entry', 'exit', 'reason'])
+    trades = pd.concat(blocks, ignore_index=True)
+
+    # Position gating: skip signals raised while an order or position is still live
+    keep = np.zeros(len(trades), dtype=bool)
+    busy_until = -1
+    signal_idx = trades['signal_idx'].to_numpy()
+    busy_end = np.where(trades['filled'], trades['exit_idx'], signal_idx + config.entry_timeout)
+    for i in range(len(trades)):
+        if signal_idx[i] > busy_until:
+            keep[i] = True
+            busy_until = busy_end[i]
+    trades = trades[keep & trades['filled'].to_numpy()].reset_index(drop=True)
+
+    gross = trades['side'] * (trades['exit'] - trades['entry']) / trades['entry']
+    trades['return'] = gross - config.maker_fee - config.taker_fee
+    trades['pnl'] = trades['return'] * config.notional
+    trades['hold_bars'] = trades['exit_idx'] - trades['fill_idx']
+    trades['entry_time'] = candles.index[trades['fill_idx'].to_numpy()]
+    trades['exit_time'] = candles.index[trades['exit_idx'].to_numpy()]
+    return trades
+
+
+def summarize(trades: pd.DataFrame, config: BacktestConfig = None) -> dict:
+    config = config or BacktestConfig()
+    if trades.empty:
+        return {'trades': 0, 'total_pnl': 0.0, 'win_rate': float('nan'), 'profit_factor': float('nan'),
+                'max_drawdown': 0.0, 'max_drawdown_pct': 0.0}
+    pnl = trades['pnl'].to_numpy()
+    equity = config.capital + np.cumsum(pnl)
+    peak = np.maximum.accumulate(np.concatenate([[config.capital], equity]))[1:]
+    drawdown = peak - equity
+    wins, losses = pnl[pnl > 0], pnl[pnl <= 0]
+    return {
+        'trades': int(len(pnl)),
+        'total_pnl': float(pnl.sum()),
+        'avg_pnl': float(pnl.mean()),
+        'win_rate': float(len(wins) / len(pnl)),
+        'avg_win': float(wins.mean()) if len(wins) else 0.0,
+        'avg_loss': float(losses.mean()) if len(losses) else 0.0,
+        'profit_factor': float(wins.sum() / -losses.sum()) if losses.sum() < 0 else float('inf'),
+        'max_drawdown': float(drawdown.max()),
+        'max_drawdown_pct': float((drawdown / peak).max() * 100),
+        'avg_hold_bars': float(trades['hold_bars'].mean()),
+        'exits': trades['reason'].value_counts().to_dict(),
+    }
+
+
+def run_backtest(candles: pd.DataFrame, params: StrategyParams = None, config: BacktestConfig = None,
+                 frames: dict = None):
+    """Signals -> fills -> stats for 1m candles. Returns (trades, stats)."""
+    params = params or StrategyParams()
+    config = config or BacktestConfig()
+    signals = generate_signals(candles, params, frames)
+    trades = simulate(candles, signals, config)
+    return trades, summarize(trades, config)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    parser = argparse.ArgumentParser(description="Backtest the TechnicalAnalyst rules on stored 1m candles.")
+    parser.add_argument("csv", help="1m OHLCV CSV written by fetch_core_5m.py")
+    args = parser.parse_args()
+    candles = load_candles(args.csv)
+    started = time.perf_counter()
+    trades, stats = run_backtest(candles)
+    logging.info(f"Backtested {len(candles)} bars in {time.perf_counter() - started:.2f}s")
+    for key, value in stats.items():
+        print(f"{key:>18}: {value}")
+    print(asdict(StrategyParams()))
@@ -0,0 +1,38 @@
+import time
+from typing import List, Optional
+
+# Candle durations for the timeframes the ETL and agent work with
+TIMEFRAME_SECONDS = {"1m": 60, "5m": 300, "15m": 900}
+# Postgres NOTIFY channel the ETL signals on once a candle close's indicators are committed
+INDICATORS_CHANNEL = "market_indicators_ready"
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    if timeframe not in TIMEFRAME_SECONDS:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    return TIMEFRAME_SECONDS[timeframe]
+
+
+def next_candle_close(timeframe: str = "1m", now: Optional[float] = None) -> int:
+    """Epoch seconds of the next candle boundary for the timeframe (exchange candles are UTC-aligned)."""
+    if now is None:
+        now = time.time()
+    seconds = timeframe_seconds(timeframe)
+    return (int(now) // seconds + 1) * seconds
+
+
+def closed_timeframes(boundary: int, timeframes: List[str]) -> List[str]:
+    """Timeframes whose candle closes exactly at the given boundary (epoch seconds)."""
+    return [tf for tf in timeframes if boundary % timeframe_seconds(tf) == 0]
+
+
+def drop_unclosed(ohlcv: list, timeframe: str, now: Optional[float] = None) -> list:
+    """Strip the still-forming candle(s) the exchange returns at the end of an OHLCV list."""
+    if now is None:
+        now = time.time()
+    period_ms = timeframe_seconds(timeframe) * 1000
+    now_ms = int(now * 1000)
+    end = len(ohlcv)
+    while end > 0 and int(ohlcv[end - 1][0]) + period_ms > now_ms:
+        end -= 1
+    return ohlcv[:end]
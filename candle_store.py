@@ -0,0 +1,255 @@
+import mmap
+import os
+import re
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from order_flow import FEATURE_FIELDS
+
+# Directory of the ring files; unset disables the store and readers fall back to TimescaleDB.
+# /dev/shm keeps the pages in RAM on Linux.
+CANDLE_STORE_DIR = os.getenv("CANDLE_STORE_DIR")
+DEFAULT_CAPACITY = 1024
+
+MAGIC = 0x4F4D5452  # "OMTR"
+LAYOUT_VERSION = 2
+
+CANDLE_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+# Numeric fields of compute_indicators, stored as float64 (NaN when not available)
+INDICATOR_FIELDS = [
+    'ema', 'sma', 'ema_fast', 'ema_slow', 'ema_slope', 'rsi', 'atr', 'atr_pct', 'macd', 'macdsignal',
+    'macdhist', 'bb_upper', 'bb_middle', 'bb_lower', 'bb_width', 'stoch_k', 'stoch_d', 'adx', 'adx_slope',
+    'cci', 'obv', 'obv_slope', 'vwap', 'last_close', 'swing_high', 'swing_low', 'volume_avg_20',
+    'volume_spike',
+] + FEATURE_FIELDS
+# Categorical fields are packed into small integers so the record stays fixed-size
+CROSS_CODES = {'bullish': 1, 'bearish': -1, 'none': 0}
+MOMENTUM_CODES = {'bullish': 1, 'bearish': -1, 'neutral': 0}
+PATTERNS = [
+    'bullish_engulfing', 'bearish_engulfing', 'hammer', 'doji', 'bullish_harami', 'bearish_harami',
+    'shooting_star', 'morning_star', 'evening_star', 'three_white_soldiers', 'three_black_crows',
+    'three_inside_up', 'three_inside_down',
+]
+
+RECORD_DTYPE = np.dtype(
+    [('ts', '<i8')]
+    + [(name, '<f8') for name in CANDLE_FIELDS + INDICATOR_FIELDS]
+    + [('ema_cross', 'i1'), ('momentum', 'i1'), ('near_bb_upper', 'i1'), ('_pad', 'i1'), ('patterns', '<u4')]
+)
+# magic, layout version, record size, capacity, version counter, records written
+HEADER_DTYPE = np.dtype([('magic', '<u4'), ('layout', '<u4'), ('itemsize', '<u4'), ('capacity', '<u4'),
+                         ('version', '<u8'), ('count', '<u8')])
+HEADER_SIZE = 64
+
+
+class StoreLayoutError(RuntimeError):
+    pass
+
+
+class ConsistencyError(RuntimeError):
+    """A reader kept losing the race with the writer (ring too small or reader too slow)."""
+
+
+def series_path(symbol: str, timeframe: str, directory: Optional[str] = None) -> str:
+    name = re.sub(r'[^A-Za-z0-9]+', '_', symbol).strip('_')
+    return os.path.join(directory or CANDLE_STORE_DIR, f"{name}-{timeframe}.ring")
+
+
+def encode_record(candle, indicators: dict) -> np.ndarray:
+    """One fixed-layout record from an OHLCV row and a compute_indicators dict."""
+    record = np.zeros((), dtype=RECORD_DTYPE)
+    record['ts'] = int(candle[0])
+    for name, value in zip(CANDLE_FIELDS, candle[1:6]):
+        record[name] = value
+    for name in INDICATOR_FIELDS:
+        value = indicators.get(name)
+        record[name] = np.nan if value is None else value
+    record['ema_cross'] = CROSS_CODES.get(indicators.get('ema_cross'), 0)
+    record['momentum'] = MOMENTUM_CODES.get(indicators.get('momentum'), 0)
+    record['near_bb_upper'] = bool(indicators.get('near_bb_upper'))
+    record['patterns'] = sum(1 << PATTERNS.index(p) for p in indicators.get('candle_pattern') or [] if p in PATTERNS)
+    return record
+
+
+def decode_record(record) -> dict:
+    """Back to the compute_indicators document the DB stores."""
+    crosses = {v: k for k, v in CROSS_CODES.items()}
+    momenta = {v: k for k, v in MOMENTUM_CODES.items()}
+    indicators = {name: float(record[name]) for name in INDICATOR_FIELDS}
+    patterns = [p for i, p in enumerate(PATTERNS) if int(record['patterns']) >> i & 1]
+    indicators.update({
+        'ema_cross': crosses[int(record['ema_cross'])],
+        'momentum': momenta[int(record['momentum'])],
+        'timestamp': int(record['ts']),
+        'candle_pattern': patterns or None,
+        'near_bb_upper': bool(record['near_bb_upper']),
+    })
+    return indicators
+
+
+class CandleStore:
+    """
+    Fixed-capacity ring of candle+indicator records for one series in a memory-mapped file.
+
+    One writer (the ETL) and any number of reader processes, without locks: each slot has a
+    sequence number that is odd while the writer is inside it (a seqlock). Readers copy or view
+    the slot and re-check its sequence; a change means the slot was rewritten and the read retries.
+    """
+
+    def __init__(self, path: str, capacity: int = DEFAULT_CAPACITY, create: bool = False):
+        self.path = path
+        self.writable = create
+        if create:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            size = HEADER_SIZE + capacity * (8 + RECORD_DTYPE.itemsize)
+            fresh = not os.path.exists(path) or os.path.getsize(path) != size
+            with open(path, 'a+b') as f:
+                f.truncate(size)
+        self._file = open(path, 'r+b' if create else 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE if create else mmap.ACCESS_READ)
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self._mm)
+        if create and (fresh or int(self.header['magic']) != MAGIC):
+            self.header['count'] = 0
+            self.header['version'] = 0
+            self.header['itemsize'] = RECORD_DTYPE.itemsize
+            self.header['capacity'] = capacity
+            self.header['layout'] = LAYOUT_VERSION
+            self.header['magic'] = MAGIC
+        if (int(self.header['magic']), int(self.header['layout']), int(self.header['itemsize'])) != (
+                MAGIC, LAYOUT_VERSION, RECORD_DTYPE.itemsize):
+            raise StoreLayoutError(f"{path} was written with a different record layout")
+        self.capacity = int(self.header['capacity'])
+        self.seqs = np.ndarray((self.capacity,), dtype='<u8', buffer=self._mm, offset=HEADER_SIZE)
+        # Zero-copy view of every slot, in ring order
+        self.ring = np.ndarray((self.capacity,), dtype=RECORD_DTYPE, buffer=self._mm,
+                               offset=HEADER_SIZE + self.capacity * 8)
+
+    @classmethod
+    def for_series(cls, symbol: str, timeframe: str, create: bool = False, directory: Optional[str] = None,
+                   capacity: int = DEFAULT_CAPACITY):
+        return cls(series_path(symbol, timeframe, directory), capacity, create)
+
+    def __len__(self):
+        return min(int(self.header['count']), self.capacity)
+
+    # Writer side
+
+    def _write_slot(self, slot: int, record):
+        version = int(self.header['version'])
+        self.seqs[slot] = version + 1  # Odd: readers of this slot retry
+        self.ring[slot] = record
+        self.seqs[slot] = version + 2
+        self.header['version'] = version + 2
+
+    def append(self, record):
+        """Append a record, or rewrite the newest one if it has the same timestamp (like the DB upsert)."""
+        if not self.writable:
+            raise PermissionError(f"{self.path} is open read-only")
+        count = int(self.header['count'])
+        if count:
+            last = (count - 1) % self.capacity
+            last_ts = int(self.ring['ts'][last])
+            if record['ts'] == last_ts:
+                self._write_slot(last, record)
+                return
+            if record['ts'] < last_ts:
+                return  # Out-of-order: the ring only moves forward
+        self._write_slot(count % self.capacity, record)
+        self.header['count'] = count + 1
+
+    def write(self, candle, indicators: dict):
+        self.append(encode_record(candle, indicators))
+
+    # Reader side
+
+    def _slots(self, n: int, count: int) -> np.ndarray:
+        n = min(n, count, self.capacity)
+        return np.arange(count - n, count) % self.capacity
+
+    def read(self, n: int = 1, retries: int = 100) -> np.ndarray:
+        """Copy of the newest `n` records, oldest first, guaranteed untorn."""
+        for _ in range(retries):
+            records, token = self._take(n, copy=True)
+            if self.verify(token):
+                return records
+            time.sleep(0)
+        raise ConsistencyError(f"{self.path}: writer kept overwriting the requested records")
+
+    def view(self, n: int) -> Tuple[np.ndarray, tuple]:
+        """
+        Zero-copy view of the newest `n` records when they are contiguous in the ring (a copy
+        otherwise) and a token. Use the values, then call `verify(token)`; False means the writer
+        touched them meanwhile and they must be re-read.
+        """
+        return self._take(n, copy=False)
+
+    def _take(self, n: int, copy: bool):
+        count = int(self.header['count'])
+        slots = self._slots(n, count)
+        seqs = self.seqs[slots].copy()
+        if not copy and len(slots) and slots[-1] >= slots[0]:
+            records = self.ring[slots[0]:slots[-1] + 1]
+        else:
+            records = self.ring[slots]  # Fancy indexing copies
+        return records, (slots, seqs, count)
+
+    def verify(self, token: tuple) -> bool:
+        slots, seqs, count = token
+        if (seqs & 1).any() or not np.array_equal(seqs, self.seqs[slots]):
+            return False
+        # The writer may have lapped the ring between reading `count` and the sequence numbers,
+        # in which case the slots hold newer records than the ones asked for
+        return int(self.header['count']) - count <= self.capacity - len(slots)
+
+    def latest(self) -> Optional[dict]:
+        """Newest record as an indicator document, or None if nothing was written yet."""
+        records = self.read(1)
+        return decode_record(records[-1]) if len(records) else None
+
+    def close(self):
+        # Drop our views before unmapping, or mmap refuses to close with exported buffers
+        self.header = self.seqs = self.ring = None
+        self._mm.close()
+        self._file.close()
+
+
+_writers = {}
+_readers = {}
+
+
+def store_indicators(symbol: str, timeframe: str, candle, indicators: dict):
+    """ETL hook: publish the freshly computed record to the local ring (no-op when the store is disabled)."""
+    if not CANDLE_STORE_DIR:
+        return
+    key = (symbol, timeframe)
+    if key not in _writers:
+        _writers[key] = CandleStore.for_series(symbol, timeframe, create=True)
+    _writers[key].write(candle, indicators)
+
+
+def _reader(symbol: str, timeframe: str) -> Optional[CandleStore]:
+    if not CANDLE_STORE_DIR:
+        return None
+    key = (symbol, timeframe)
+    if key not in _readers:
+        path = series_path(symbol, timeframe)
+        if not os.path.exists(path):
+            return None
+        _readers[key] = CandleStore(path)
+    return _readers[key]
+
+
+def read_latest(symbol: str, timeframe: str) -> Optional[dict]:
+    """Newest indicators for a series from the local ring; None when the store is disabled or empty."""
+    store = _reader(symbol, timeframe)
+    return store.latest() if store is not None else None
+
+
+def read_history(symbol: str, timeframe: str, n: int) -> Optional[np.ndarray]:
+    """Newest `n` records from the local ring, oldest first; None unless the ring holds all of them."""
+    store = _reader(symbol, timeframe)
+    if store is None or len(store) < n:
+        return None
+    return store.read(n)
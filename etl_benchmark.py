@@ -0,0 +1,196 @@
+import argparse
+import itertools
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import tracing
+from etl_to_timescaledb import FETCH_BARS, TIMEFRAMES, ensure_table_exists, run_etl
+from sim_exchange import SimExchange
+
+# Stages recorded by run_etl, in pipeline order
+STAGES = ["exchange_fetch", "frame_build", "indicator_compute", "json_encode", "db_upsert", "db_notify"]
+
+
+class _SQLiteCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def execute(self, sql, params=()):
+        return self.cursor.execute(sql.replace("%s", "?"), params)
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    def close(self):
+        self.cursor.close()
+
+
+class SQLiteStandIn:
+    """
+    psycopg2-shaped connection over a local SQLite file, enough for the ETL's SQL: %s
+    placeholders, ON CONFLICT upserts, pg_notify() (counted, not delivered) and an empty
+    pg_extension catalog so TimescaleDB-only setup is skipped. SQLite serialises writers,
+    so at high worker counts db_upsert measures SQLite's lock, not Postgres.
+    """
+
+    notifications = itertools.count()
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.create_function("pg_notify", 2, lambda channel, payload: next(self.notifications))
+        self.conn.execute("CREATE TABLE IF NOT EXISTS pg_extension (extname TEXT)")
+
+    def cursor(self):
+        return _SQLiteCursor(self.conn.cursor())
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.conn.close()
+
+
+class ConnectionPool:
+    """One connection per worker thread, opened lazily and reused across ticks like a long-lived ETL worker."""
+
+    def __init__(self, connect):
+        self.connect = connect
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+
+    def get(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = self.connect()
+            with self.lock:
+                self.connections.append(conn)
+        return conn
+
+    def close(self):
+        for conn in self.connections:
+            conn.close()
+
+
+def _percentiles(values) -> dict:
+    ms = np.asarray(values, dtype=float) * 1000
+    if not len(ms):
+        return {'count': 0, 'p50_ms': None, 'p99_ms': None, 'total_s': 0.0}
+    return {'count': len(ms), 'p50_ms': float(np.percentile(ms, 50)), 'p99_ms': float(np.percentile(ms, 99)),
+            'total_s': float(ms.sum() / 1000)}
+
+
+def benchmark(sim: SimExchange, symbols, pool: ConnectionPool, ticks: int = 3, workers: int = 8,
+              timeframes=TIMEFRAMES) -> dict:
+    """
+    Run `ticks` candle closes of run_etl for every symbol against the simulated exchange and the
+    given connections. Returns throughput, per-symbol tick latency and a per-stage breakdown.
+    """
+    samples = {stage: [] for stage in STAGES}
+
+    def sink(stage, seconds, attrs):
+        if stage in samples:
+            samples[stage].append(seconds)
+
+    def tick(symbol, now):
+        start = time.perf_counter()
+        stored = run_etl(timeframes, symbol, exchange=sim, conn=pool.get(), now=now)
+        return time.perf_counter() - start, len(stored) == len(timeframes)
+
+    tick_seconds, round_seconds, failures = [], [], 0
+    tracing.add_sink(sink)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for _ in range(ticks):
+                sim.step()
+                now = sim.now_ms() / 1000
+                started = time.perf_counter()
+                for seconds, ok in executor.map(lambda s: tick(s, now), symbols):
+                    tick_seconds.append(seconds)
+                    failures += not ok
+                round_seconds.append(time.perf_counter() - started)
+    finally:
+        tracing.remove_sink(sink)
+
+    busy = sum(sum(values) for values in samples.values()) or 1.0
+    stages = {}
+    for stage, values in samples.items():
+        stages[stage] = _percentiles(values)
+        stages[stage]['share'] = sum(values) / busy
+    return {
+        'symbols': len(symbols),
+        'workers': workers,
+        'ticks': ticks,
+        'symbols_per_second': len(symbols) * ticks / sum(round_seconds),
+        'tick': _percentiles(tick_seconds),
+        'round_p50_s': float(np.percentile(round_seconds, 50)),
+        'failed_ticks': failures,
+        'stages': stages,
+    }
+
+
+def format_report(result: dict) -> str:
+    tick = result['tick']
+    lines = [f"{result['symbols']} symbols x {result['ticks']} ticks, {result['workers']} workers: "
+             f"{result['symbols_per_second']:.1f} symbols/s, tick p50 {tick['p50_ms']:.1f} ms / "
+             f"p99 {tick['p99_ms']:.1f} ms, round p50 {result['round_p50_s']:.2f}s, failed {result['failed_ticks']}",
+             f"  {'stage':<18}{'count':>7}{'p50 ms':>10}{'p99 ms':>10}{'share':>8}"]
+    for stage, stats in result['stages'].items():
+        if stats['count']:
+            lines.append(f"  {stage:<18}{stats['count']:>7}{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+                         f"{stats['share']:>8.1%}")
+    return "\n".join(lines)
+
+
+def sqlite_pool(path: str) -> ConnectionPool:
+    pool = ConnectionPool(lambda: SQLiteStandIn(path))
+    ensure_table_exists(pool.get())
+    return pool
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="End-to-end run_etl throughput against SimExchange and a local DB.")
+    parser.add_argument("--symbols", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--ticks", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--history", type=int, default=FETCH_BARS * 15,
+                        help="1m bars per symbol (default: a full fetch window of 15m candles)")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--dsn", help="Postgres/TimescaleDB DSN of a scratch database (default: local SQLite file)")
+    parser.add_argument("--trace", action="store_true", help="keep writing TRACE_FILE during the run")
+    args = parser.parse_args()
+
+    if not args.trace:
+        tracing.TRACE_FILE = ""
+    names = [f"BENCH{i}/USDT:USDT" for i in range(max(args.symbols))]
+    print(f"Generating {args.history} bars for {len(names)} symbols...")
+    sim = SimExchange(names, history=args.history, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.symbols:
+            if args.dsn:
+                import psycopg2
+                pool = ConnectionPool(lambda: psycopg2.connect(args.dsn))
+                ensure_table_exists(pool.get())
+            else:
+                pool = sqlite_pool(os.path.join(tmp, f"bench_{count}.db"))
+            try:
+                print(format_report(benchmark(sim, names[:count], pool, args.ticks, args.workers)))
+            finally:
+                pool.close()
@@ -1,12 +1,24 @@
 import os
+import sys
 import json
 import logging
 from dotenv import load_dotenv
 import psycopg2
-from trade_utils import fetch_ohlcv, compute_indicators
+from trade_utils import fetch_ohlcv, fetch_window, compute_indicators, ohlcv_frame
+from candle_store import store_indicators
+from order_flow import order_flow_features
+from candle_clock import drop_unclosed, timeframe_seconds, INDICATORS_CHANNEL
+from tracing import new_trace, record, span
 import time
 import ccxt
 
+SYMBOL = "CORE/USDT:USDT"
+# Comma-separated list of symbols the scheduler refreshes on every candle close
+SYMBOLS = [s.strip() for s in os.getenv("SYMBOLS", SYMBOL).split(",") if s.strip()]
+TIMEFRAMES = ["1m", "5m", "15m"]
+# Bars fetched per series: enough warm-up for every indicator to match a long-history computation
+FETCH_BARS = fetch_window()
+
 def get_timescaledb_conn():
     load_dotenv()
     db_url = os.getenv("TIMESCALEDB_URL")
@@ -14,8 +26,10 @@ def get_timescaledb_conn():
         raise ValueError("TIMESCALEDB_URL not set in environment.")
     return psycopg2.connect(db_url)
 
-def ensure_table_exists():
-    conn = get_timescaledb_conn()
+def ensure_table_exists(conn=None):
+    own_conn = conn is None
+    if own_conn:
+        conn = get_timescaledb_conn()
     cur = conn.cursor()
     cur.execute('''
         CREATE TABLE IF NOT EXISTS market_indicators (
@@ -26,38 +40,101 @@ def ensure_table_exists():
             PRIMARY KEY (symbol, timeframe, timestamp)
         );
     ''')
+    # The primary key (symbol, timeframe, timestamp) is the composite index behind latest-row and history
+    # range scans; as a hypertable, time_bucket queries over recent bars also skip old chunks.
+    cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+    if cur.fetchone():
+        cur.execute("SELECT create_hypertable('market_indicators', 'timestamp', chunk_time_interval => %s,"
+                    " if_not_exists => TRUE, migrate_data => TRUE)", (7 * 24 * 3600 * 1000,))
     conn.commit()
     cur.close()
-    conn.close()
+    if own_conn:
+        conn.close()
 
-def store_to_timescaledb(symbol, timeframe, indicators, timestamp):
-    conn = get_timescaledb_conn()
+def store_to_timescaledb(symbol, timeframe, indicators, timestamp, conn=None):
+    own_conn = conn is None
+    if own_conn:
+        conn = get_timescaledb_conn()
     cur = conn.cursor()
     cur.execute('''
         INSERT INTO market_indicators (symbol, timeframe, timestamp, indicators)
         VALUES (%s, %s, %s, %s)
         ON CONFLICT (symbol, timeframe, timestamp) DO UPDATE
         SET indicators = EXCLUDED.indicators;
-    ''', (symbol, timeframe, timestamp, json.dumps(indicators)))
+    ''', (symbol, timeframe, timestamp, indicators if isinstance(indicators, str) else json.dumps(indicators)))
+    conn.commit()
+    cur.close()
+    if own_conn:
+        conn.close()
+
+def notify_indicators_ready(conn, symbol, timeframes, timestamp, trace_id=None, change=None):
+    """
+    Wake up agents LISTENing on INDICATORS_CHANNEL; delivered once the notify commits.
+    `change` is the last 1m close-to-close move in ATRs, used to prioritise symbols that just moved.
+    """
+    payload = json.dumps({"symbol": symbol, "timeframes": timeframes, "timestamp": timestamp,
+                          "trace_id": trace_id, "change": change})
+    cur = conn.cursor()
+    cur.execute("SELECT pg_notify(%s, %s)", (INDICATORS_CHANNEL, payload))
     conn.commit()
     cur.close()
-    conn.close()
 
-def run_etl():
-    symbol = "CORE/USDT:USDT"
-    for timeframe in ["1m", "5m", "15m"]:
-        for attempt in range(3):  # Try up to 3 times
-            try:
-                ohlcv = fetch_ohlcv(symbol, timeframe, 100)
-                indicators = compute_indicators(ohlcv)
-                timestamp = int(ohlcv[-1][0])
-                store_to_timescaledb(symbol, timeframe, indicators, timestamp)
-                print(f"Stored indicators for {symbol} {timeframe} at {timestamp}")
-                break  # Success!
-            except Exception as e:
-                logging.exception(f"ETL failed for {symbol} {timeframe}: {e}")
-                break  # Don't retry for other errors
+def run_etl(timeframes=None, symbol=SYMBOL, exchange=None, conn=None, now=None):
+    """
+    Refresh indicators for the given timeframes from closed candles only; returns the timeframes stored.
+    `exchange`, `conn` and `now` (seconds) let benchmarks drive it against stand-ins and a simulated clock.
+    """
+    if timeframes is None:
+        timeframes = TIMEFRAMES
+    stored = []
+    latest_timestamp = None
+    change = None
+    # One trace per candle close; the agent adopts it from the NOTIFY payload
+    trace_id = new_trace()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_timescaledb_conn()
+    try:
+        for timeframe in timeframes:
+            for attempt in range(3):  # Try up to 3 times
+                try:
+                    with span("exchange_fetch", symbol=symbol, timeframe=timeframe):
+                        ohlcv = drop_unclosed(fetch_ohlcv(symbol, timeframe, FETCH_BARS, exchange=exchange), timeframe, now)
+                    with span("frame_build", symbol=symbol, timeframe=timeframe):
+                        df = ohlcv_frame(ohlcv)
+                    with span("indicator_compute", symbol=symbol, timeframe=timeframe):
+                        indicators = compute_indicators(df)
+                    if timeframe == "1m":
+                        # Live book/trade-flow features, when a collector runs in this process
+                        indicators.update(order_flow_features(symbol))
+                    timestamp = int(ohlcv[-1][0])
+                    # Local readers see the record before the DB round trip; the DB stays the durable copy
+                    store_indicators(symbol, timeframe, ohlcv[-1], indicators)
+                    with span("json_encode", symbol=symbol, timeframe=timeframe):
+                        document = json.dumps(indicators)
+                    with span("db_upsert", symbol=symbol, timeframe=timeframe):
+                        store_to_timescaledb(symbol, timeframe, document, timestamp, conn=conn)
+                    candle_close = timestamp / 1000 + timeframe_seconds(timeframe)
+                    record("candle_close_to_commit", time.time() - candle_close, symbol=symbol, timeframe=timeframe)
+                    logging.info(f"Stored indicators for {symbol} {timeframe} at {timestamp}")
+                    stored.append(timeframe)
+                    if timeframe == "1m" and indicators.get('atr'):
+                        change = round(abs(ohlcv[-1][4] - ohlcv[-2][4]) / indicators['atr'], 4)
+                    latest_timestamp = max(latest_timestamp or 0, timestamp)
+                    break  # Success!
+                except Exception as e:
+                    logging.exception(f"ETL failed for {symbol} {timeframe}: {e}")
+                    conn.rollback()
+                    break  # Don't retry for other errors
+        if stored:
+            with span("db_notify", symbol=symbol):
+                notify_indicators_ready(conn, symbol, stored, latest_timestamp, trace_id, change)
+    finally:
+        if own_conn:
+            conn.close()
+    return stored
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     ensure_table_exists()
-    run_etl()
+    run_etl(sys.argv[1:] or None)
@@ -0,0 +1,140 @@
+import logging
+import math
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import ccxt
+
+
+class OrderValidationError(ValueError):
+    """Order would be rejected by the exchange; raised locally before anything is sent."""
+
+
+@dataclass(frozen=True)
+class MarketRules:
+    symbol: str
+    tick_size: float
+    lot_size: float
+    min_amount: float
+    max_amount: Optional[float]
+    min_cost: float
+    max_leverage: Optional[float]
+
+    @property
+    def price_decimals(self) -> int:
+        return _decimals(self.tick_size)
+
+    @property
+    def amount_decimals(self) -> int:
+        return _decimals(self.lot_size)
+
+
+def _decimals(step: float) -> int:
+    # Digits the step itself carries (0.25 -> 2), so rounding never moves a value off the step grid
+    return max(0, -Decimal(str(step)).normalize().as_tuple().exponent)
+
+
+@dataclass(frozen=True)
+class PreparedOrder:
+    symbol: str
+    signal: str
+    amount: float
+    entry_price: float
+    stop_loss: float
+    take_profit: float
+
+
+def _step(value, precision_mode) -> float:
+    # ccxt reports precision either as a step (TICK_SIZE) or as a number of decimals
+    if precision_mode == ccxt.DECIMAL_PLACES:
+        return 10 ** -int(value)
+    return float(value)
+
+
+def market_rules(market: dict, precision_mode=ccxt.TICK_SIZE) -> MarketRules:
+    limits = market.get('limits') or {}
+    amount_limits = limits.get('amount') or {}
+    lot_size = _step(market['precision']['amount'], precision_mode)
+    return MarketRules(
+        symbol=market['symbol'],
+        tick_size=_step(market['precision']['price'], precision_mode),
+        lot_size=lot_size,
+        min_amount=float(amount_limits.get('min') or lot_size),
+        max_amount=amount_limits.get('max'),
+        min_cost=float((limits.get('cost') or {}).get('min') or 0),
+        max_leverage=(limits.get('leverage') or {}).get('max'),
+    )
+
+
+class ExecutionContext:
+    """
+    Exchange client plus market rules loaded once at startup, so orders are
+    normalized and validated locally instead of being rejected after a round trip.
+    """
+
+    def __init__(self, exchange, symbols: List[str], leverage: Optional[float] = None):
+        self.exchange = exchange
+        exchange.load_markets()
+        self._rules: Dict[str, MarketRules] = {
+            symbol: market_rules(exchange.market(symbol), exchange.precisionMode) for symbol in symbols
+        }
+        if leverage:
+            for symbol in symbols:
+                self._set_leverage(symbol, leverage)
+
+    def _set_leverage(self, symbol: str, leverage: float):
+        rules = self._rules[symbol]
+        if rules.max_leverage and leverage > rules.max_leverage:
+            raise OrderValidationError(f"Leverage {leverage} exceeds {symbol} max {rules.max_leverage}")
+        try:
+            self.exchange.set_leverage(leverage, symbol)
+        except ccxt.BadRequest as e:
+            # Bybit rejects setting the leverage it already has
+            logging.info(f"Leverage for {symbol} unchanged: {e}")
+
+    def rules(self, symbol: str) -> MarketRules:
+        if symbol not in self._rules:
+            self._rules[symbol] = market_rules(self.exchange.market(symbol), self.exchange.precisionMode)
+        return self._rules[symbol]
+
+    def normalize_price(self, symbol: str, price: float) -> float:
+        rules = self.rules(symbol)
+        return round(round(price / rules.tick_size) * rules.tick_size, rules.price_decimals)
+
+    def normalize_amount(self, symbol: str, amount: float) -> float:
+        # Always round amounts down so normalization never increases exposure
+        rules = self.rules(symbol)
+        return round(math.floor(amount / rules.lot_size + 1e-9) * rules.lot_size, rules.amount_decimals)
+
+    def amount_for_notional(self, symbol: str, notional: float, price: float) -> float:
+        return self.normalize_amount(symbol, notional / price)
+
+    def prepare_order(self, symbol: str, signal: str, amount: float, entry_price: float,
+                      stop_loss: float, take_profit: float) -> PreparedOrder:
+        """Normalize an entry with its TP/SL to market precision; raise OrderValidationError if it cannot be placed."""
+        if signal not in ("BUY", "SELL"):
+            raise OrderValidationError(f"Unsupported signal: {signal}")
+        rules = self.rules(symbol)
+        order = PreparedOrder(
+            symbol=symbol,
+            signal=signal,
+            amount=self.normalize_amount(symbol, amount),
+            entry_price=self.normalize_price(symbol, entry_price),
+            stop_loss=self.normalize_price(symbol, stop_loss),
+            take_profit=self.normalize_price(symbol, take_profit),
+        )
+        if min(order.entry_price, order.stop_loss, order.take_profit) <= 0:
+            raise OrderValidationError(f"Prices must be positive after rounding to tick {rules.tick_size}: {order}")
+        if order.amount < rules.min_amount:
+            raise OrderValidationError(f"Amount {amount} is below {symbol} minimum {rules.min_amount}")
+        if rules.max_amount and order.amount > rules.max_amount:
+            raise OrderValidationError(f"Amount {amount} exceeds {symbol} maximum {rules.max_amount}")
+        notional = order.amount * order.entry_price
+        if notional < rules.min_cost:
+            raise OrderValidationError(f"Notional {notional:.4f} is below {symbol} minimum {rules.min_cost}")
+        if signal == "BUY" and not order.stop_loss < order.entry_price < order.take_profit:
+            raise OrderValidationError(f"BUY needs stop_loss < entry < take_profit, got {order.stop_loss}/{order.entry_price}/{order.take_profit}")
+        if signal == "SELL" and not order.take_profit < order.entry_price < order.stop_loss:
+            raise OrderValidationError(f"SELL needs take_profit < entry < stop_loss, got {order.take_profit}/{order.entry_price}/{order.stop_loss}")
+        return order
@@ -0,0 +1,145 @@
+import math
+from typing import Dict, List, Optional
+
+# Bump when keys or quantization change so prompts and consumers can tell payloads apart
+SCHEMA_VERSION = 2
+
+# (short key, indicator field, encoding) in output order. Only what the decision logic reads:
+# absolute OBV, CCI, swing levels, raw volume average etc. stay in TimescaleDB.
+COMPACT_FIELDS = [
+    ('t', 'timestamp', 'int'),
+    ('c', 'last_close', 'price'),
+    ('e', 'ema', 'price'),
+    ('s', 'sma', 'price'),
+    ('esl', 'ema_slope', 'sign'),
+    ('ef', 'ema_fast', 'price'),
+    ('es', 'ema_slow', 'price'),
+    ('x', 'ema_cross', 'cross'),
+    ('r', 'rsi', 'osc'),
+    ('a', 'atr', 'price'),
+    ('ap', 'atr_pct', 'pct'),
+    ('mh', 'macdhist', 'sig'),
+    ('bu', 'bb_upper', 'price'),
+    ('bm', 'bb_middle', 'price'),
+    ('bl', 'bb_lower', 'price'),
+    ('k', 'stoch_k', 'osc'),
+    ('d', 'stoch_d', 'osc'),
+    ('adx', 'adx', 'osc'),
+    ('osl', 'obv_slope', 'sign'),
+    ('vd', 'vwap', 'vwap_dist'),
+    ('vs', 'volume_spike', 'ratio'),
+    ('cp', 'candle_pattern', 'list'),
+    # Order flow, 1m only (null when no book/trade feed)
+    ('bi', 'book_imbalance', 'pct'),
+    ('mp', 'microprice', 'price'),
+    ('sp', 'spread_bps', 'ratio'),
+    ('sv', 'session_vwap', 'price'),
+    ('dv', 'volume_delta', 'sig'),
+    ('dvw', 'volume_delta_window', 'sig'),
+    ('br', 'buy_ratio_window', 'pct'),
+]
+
+# Legend for the agent prompt; stable across payloads so it is paid for once per conversation
+LEGEND = (
+    "t=candle open ms, c=close, e=EMA, s=SMA, esl=EMA slope sign, ef/es=fast/slow EMA, "
+    "x=EMA cross (1 bull, -1 bear, 0 none), r=RSI, a=ATR, ap=ATR % of close, mh=MACD hist, "
+    "bu/bm/bl=Bollinger upper/mid/lower, k/d=Stoch %K/%D, adx=ADX, osl=OBV slope sign, "
+    "vd=close-to-VWAP distance %, vs=volume / 20-bar average, cp=candle patterns, "
+    "bi=top-5 book imbalance (-1 ask-heavy..1 bid-heavy), mp=microprice, sp=spread bps, sv=session VWAP (UTC day), "
+    "dv/dvw=taker buy-sell volume for the session/last 60s, br=taker buy share of last 60s volume; null=not available"
+)
+
+PRICE_SIGNIFICANT_DIGITS = 6
+SIGNAL_SIGNIFICANT_DIGITS = 3
+CROSS_CODES = {'bullish': 1, 'bearish': -1}
+
+
+def _finite(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def price_decimals(reference: float, significant: int = PRICE_SIGNIFICANT_DIGITS) -> int:
+    """Decimals that keep `significant` digits at the scale of `reference` (e.g. 0.5123 -> 6)."""
+    if not _finite(reference) or reference == 0:
+        return significant
+    return max(0, significant - 1 - math.floor(math.log10(abs(reference))))
+
+
+def _significant(value: float, digits: int) -> float:
+    if value == 0:
+        return 0.0
+    return round(value, digits - 1 - math.floor(math.log10(abs(value))))
+
+
+def _encode(kind: str, value, indicators: dict, decimals: int):
+    if kind == 'cross':
+        return CROSS_CODES.get(value, 0)
+    if kind == 'list':
+        return value or None
+    if kind == 'vwap_dist':
+        close = indicators.get('last_close')
+        if not (_finite(value) and _finite(close)) or value == 0:
+            return None
+        return round((close - value) / value * 100, 3)
+    if not _finite(value):
+        return None
+    if kind == 'int':
+        return int(value)
+    if kind == 'price':
+        return round(value, decimals)
+    if kind == 'sign':
+        return (value > 0) - (value < 0)
+    if kind == 'osc':
+        return round(value, 1)
+    if kind == 'pct':
+        return round(value, 3)
+    if kind == 'ratio':
+        return round(value, 2)
+    if kind == 'sig':
+        return _significant(value, SIGNAL_SIGNIFICANT_DIGITS)
+    raise ValueError(f"Unknown encoding: {kind}")
+
+
+def compact_row(indicators: dict) -> list:
+    """Values of COMPACT_FIELDS for one timeframe, in order; prices keep 6 significant digits of the close."""
+    decimals = price_decimals(indicators.get('last_close'))
+    return [_encode(kind, indicators.get(field), indicators, decimals) for _, field, kind in COMPACT_FIELDS]
+
+
+def compact_indicators(indicators: dict, timeframe: Optional[str] = None) -> dict:
+    """Project a stored indicator document onto the short-key schema."""
+    payload = {'v': SCHEMA_VERSION}
+    if timeframe:
+        payload['tf'] = timeframe
+    payload.update(zip((key for key, _, _ in COMPACT_FIELDS), compact_row(indicators)))
+    return payload
+
+
+def compact_table(by_timeframe: Dict[str, dict], symbol: Optional[str] = None) -> dict:
+    """
+    Merge several timeframes into one table: the column list is sent once and each
+    timeframe is a single row, e.g. {"v":SCHEMA_VERSION,"cols":["t","c",...],"rows":{"1m":[...],"5m":[...]}}.
+    """
+    table = {'v': SCHEMA_VERSION}
+    if symbol:
+        table['sym'] = symbol
+    table['cols'] = [key for key, _, _ in COMPACT_FIELDS]
+    table['rows'] = {tf: compact_row(indicators) for tf, indicators in by_timeframe.items()}
+    return table
+
+
+# History columns use the full field names; the VWAP itself is sent rather than the distance
+HISTORY_ENCODINGS = {field: 'price' if kind == 'vwap_dist' else kind for _, field, kind in COMPACT_FIELDS}
+
+
+def quantize(field: str, value, decimals: int):
+    """One history value at the precision its field gets in the compact snapshot (6 significant digits otherwise)."""
+    kind = HISTORY_ENCODINGS.get(field)
+    if kind is None:
+        return _significant(value, PRICE_SIGNIFICANT_DIGITS) if _finite(value) else None
+    return _encode(kind, value, {}, decimals)
+
+
+def expand_row(row: List) -> dict:
+    """Short-key row back to a {short key: value} dict (for logs and tests)."""
+    return dict(zip((key for key, _, _ in COMPACT_FIELDS), row))
@@ -0,0 +1,114 @@
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from execution_context import ExecutionContext, OrderValidationError
+from order_execution import place_protected_entry
+from sim_exchange import SimExchange
+from trade_utils import compute_indicators, fetch_ohlcv, fetch_window
+
+TIMEFRAMES = ["1m", "5m", "15m"]
+ORDER_NOTIONAL = 20.0
+
+
+def rule_decision(indicators: dict):
+    """Deterministic stand-in for the LLM so the loop can run offline: RSI extremes with ATR stops."""
+    close, atr, rsi = indicators['last_close'], indicators['atr'], indicators['rsi']
+    if rsi < 30:
+        return "BUY", close, close - 1.5 * atr, close + 2 * atr
+    if rsi > 70:
+        return "SELL", close, close + 1.5 * atr, close - 2 * atr
+    return None
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+
+    def time(self, stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+
+    def report(self) -> str:
+        lines = [f"{'stage':<22}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for stage, values in self.samples.items():
+            ms = np.asarray(values) * 1000
+            lines.append(f"{stage:<22}{len(ms):>8}{np.percentile(ms, 50):>10.2f}{np.percentile(ms, 99):>10.2f}{ms.max():>10.2f}")
+        return "\n".join(lines)
+
+
+def symbol_cycle(sim: SimExchange, context: ExecutionContext, symbol: str, timer: StageTimer) -> str:
+    """One fetch -> compute -> position check -> execution cycle for a symbol."""
+    indicators = {}
+    for tf in TIMEFRAMES:
+        ohlcv = timer.time("exchange_fetch", fetch_ohlcv, symbol, tf, fetch_window(), exchange=sim)
+        indicators[tf] = timer.time("indicator_compute", compute_indicators, ohlcv)
+    positions = timer.time("position_check", sim.fetch_positions, [symbol])
+    if positions and positions[0]['contracts'] > 0:
+        return "in_position"
+    decision = rule_decision(indicators["1m"])
+    if decision is None:
+        return "wait"
+    signal, entry, stop_loss, take_profit = decision
+    try:
+        amount = context.amount_for_notional(symbol, ORDER_NOTIONAL, entry)
+        order = timer.time("order_validate", context.prepare_order, symbol, signal, amount, entry, stop_loss, take_profit)
+    except OrderValidationError:
+        return "rejected_locally"
+    result = timer.time("order_place", place_protected_entry, sim, symbol, signal, order.amount,
+                        order.entry_price, order.stop_loss, order.take_profit)
+    return "traded" if result.ok else "order_failed"
+
+
+def run_loadtest(symbols: int = 200, cycles: int = 5, workers: int = 32, **sim_options):
+    names = [f"SIM{i}/USDT:USDT" for i in range(symbols)]
+    sim = SimExchange(names, **sim_options)
+    context = ExecutionContext(sim, names)
+    timer = StageTimer()
+    outcomes = {}
+    cycle_seconds = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for _ in range(cycles):
+            sim.step()
+            started = time.perf_counter()
+            futures = [pool.submit(timer.time, "symbol_cycle", symbol_cycle, sim, context, s, timer) for s in names]
+            for future in futures:
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    outcome = type(e).__name__
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            cycle_seconds.append(time.perf_counter() - started)
+    return {
+        'symbols': symbols,
+        'cycles': cycles,
+        'symbols_per_second': symbols * cycles / sum(cycle_seconds),
+        'cycle_p50_s': float(np.percentile(cycle_seconds, 50)),
+        'cycle_max_s': float(max(cycle_seconds)),
+        'outcomes': outcomes,
+        'exchange_calls': sim.call_counts(),
+    }, timer
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="Offline load test of the fetch/compute/execute loop against SimExchange.")
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--rate-limit", type=float, default=None, help="requests per second")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    summary, timer = run_loadtest(args.symbols, args.cycles, args.workers, latency_ms=args.latency_ms,
+                                  jitter_ms=args.jitter_ms, rate_limit=args.rate_limit, error_rate=args.error_rate)
+    for key, value in summary.items():
+        print(f"{key:>20}: {value}")
+    print(timer.report())
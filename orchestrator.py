@@ -0,0 +1,136 @@
+import asyncio
+import contextvars
+import itertools
+import logging
+import threading
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+# The running cycle's "placing orders" flag; task and to_thread context copies carry it into tool calls
+_placing_orders: contextvars.ContextVar = contextvars.ContextVar("placing_orders", default=None)
+
+
+def mark_placing_orders():
+    """
+    Called by the order tool before it sends anything: from then on a newer candle no longer
+    cancels the cycle. Cancelling cannot stop a tool running in a worker thread; it would only
+    lose the order's result.
+    """
+    flag = _placing_orders.get()
+    if flag is not None:
+        flag.set()
+
+
+class DecisionOrchestrator:
+    """
+    Runs agent decision cycles for many symbols concurrently.
+
+    - At most `max_concurrent` cycles (each a chain of model calls) run at once.
+    - Pending symbols are dispatched by priority: more timeframes refreshed and a
+      bigger move (the ETL's `change`, in ATRs) go first.
+    - Symbols with an open position or resting orders are skipped at dispatch time.
+    - A newer candle for a symbol cancels its running cycle and replaces its queued one,
+      unless that cycle is already placing orders; then the newer candle waits for it.
+    """
+
+    def __init__(self, decide: Callable[[str, dict], Awaitable], in_position: Callable[[str], bool],
+                 max_concurrent: int = 4):
+        self.decide = decide
+        self.in_position = in_position
+        self.max_concurrent = max_concurrent
+        self._slots = asyncio.BoundedSemaphore(max_concurrent)
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._pending: Dict[str, dict] = {}
+        self._running: Dict[str, Tuple[asyncio.Task, dict, threading.Event]] = {}
+        self._seq = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.stats = {'queued': 0, 'started': 0, 'completed': 0, 'failed': 0, 'cancelled_stale': 0,
+                      'kept_placing_orders': 0, 'superseded': 0, 'skipped_in_position': 0}
+
+    @staticmethod
+    def priority(event: dict):
+        return (-len(event.get('timeframes', [])), -float(event.get('change') or 0.0))
+
+    def _latest_timestamp(self, symbol: str) -> int:
+        stamps = [self._pending[symbol]['timestamp']] if symbol in self._pending else []
+        if symbol in self._running:
+            stamps.append(self._running[symbol][1]['timestamp'])
+        return max(stamps, default=-1)
+
+    def submit(self, event: dict):
+        """Queue a decision for the event's symbol; called for every fresh-indicator notification."""
+        symbol = event['symbol']
+        if event['timestamp'] <= self._latest_timestamp(symbol):
+            return
+        running = self._running.get(symbol)
+        if running and running[2].is_set():
+            self.stats['kept_placing_orders'] += 1  # Dispatched once it finishes, then gated on its orders
+        elif running:
+            running[0].cancel()
+            self.stats['cancelled_stale'] += 1
+        if symbol in self._pending:
+            self.stats['superseded'] += 1
+        self._pending[symbol] = event
+        self._queue.put_nowait((self.priority(event), next(self._seq), symbol))
+        self.stats['queued'] += 1
+
+    async def run(self):
+        """Dispatch loop: wait for a free slot, then start the highest-priority pending symbol."""
+        while True:
+            await self._slots.acquire()
+            try:
+                while True:
+                    _, _, symbol = await self._queue.get()
+                    event = self._pending.pop(symbol, None)
+                    if event is None:
+                        continue  # Superseded entry already dispatched
+                    if symbol in self._running:
+                        self._pending[symbol] = event  # Requeued when the running cycle ends
+                        continue
+                    if self.in_position(symbol):
+                        self.stats['skipped_in_position'] += 1
+                        continue
+                    break
+            except BaseException:
+                self._slots.release()
+                raise
+            placing_orders = threading.Event()
+            task = asyncio.create_task(self._cycle(symbol, event, placing_orders))
+            self._running[symbol] = (task, event, placing_orders)
+
+    def start(self) -> asyncio.Task:
+        """Run the dispatcher as a task owned by the orchestrator; stop() cancels and awaits it."""
+        self._dispatcher = asyncio.create_task(self.run())
+        return self._dispatcher
+
+    async def _cycle(self, symbol: str, event: dict, placing_orders: threading.Event):
+        self.stats['started'] += 1
+        _placing_orders.set(placing_orders)  # The task runs in its own context copy
+        try:
+            await self.decide(symbol, event)
+            self.stats['completed'] += 1
+        except asyncio.CancelledError:
+            logging.info(f"{symbol}: decision for candle {event['timestamp']} cancelled by a newer candle")
+        except Exception as e:
+            self.stats['failed'] += 1
+            logging.exception(f"{symbol}: decision cycle failed: {e}")
+        finally:
+            if symbol in self._running and self._running[symbol][1] is event:
+                del self._running[symbol]
+            if symbol in self._pending:
+                self._queue.put_nowait((self.priority(self._pending[symbol]), next(self._seq), symbol))
+            self._slots.release()
+
+    async def drain(self):
+        """Wait for queued and running cycles to finish (used by tests and load runs)."""
+        while self._pending or self._running:
+            await asyncio.sleep(0.01)
+
+    async def stop(self):
+        """Stop dispatching, cancel running cycles and wait for all of them to unwind."""
+        tasks = [task for task, _, _ in self._running.values()]
+        if self._dispatcher is not None:
+            tasks.append(self._dispatcher)
+            self._dispatcher = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,189 @@
+import contextvars
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import List, Optional
+
+from tracing import record
+
+# Attach TP/SL to the entry in one request when the venue supports it (Bybit v5 does)
+ATTACH_TPSL = os.getenv('ATTACH_TPSL', 'true').lower() == 'true'
+
+# Protective legs go out in parallel when they cannot be attached to the entry
+_protective_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tpsl")
+# Tries at cancelling an entry during rollback while the exchange still reports it open
+ROLLBACK_CANCEL_ATTEMPTS = 3
+# Seconds before the first cancel retry; doubles after each attempt
+ROLLBACK_CANCEL_BACKOFF = 0.2
+
+
+@dataclass
+class OrderLeg:
+    name: str
+    price: Optional[float] = None
+    order_id: Optional[str] = None
+    status: str = "pending"  # placed | failed | cancelled
+    error: Optional[str] = None
+    latency_ms: float = 0.0
+    raw: Optional[dict] = field(default=None, repr=False)  # Exchange response, kept for the audit log
+
+
+@dataclass
+class ExecutionResult:
+    symbol: str
+    side: str
+    amount: float
+    mode: str  # attached | separate
+    legs: List[OrderLeg] = field(default_factory=list)
+    ok: bool = False
+    protection_latency_ms: Optional[float] = None  # entry send -> last protective ack
+    error: Optional[str] = None
+
+    def to_dict(self, include_raw: bool = False) -> dict:
+        result = asdict(self)
+        if not include_raw:
+            for leg in result['legs']:
+                leg.pop('raw', None)
+        return result
+
+
+def _place(leg: OrderLeg, send) -> OrderLeg:
+    start = time.perf_counter()
+    try:
+        order = send()
+        leg.order_id = order.get('id')
+        leg.raw = order.get('info') or order
+        leg.status = "placed"
+    except Exception as e:
+        leg.status = "failed"
+        leg.error = str(e)
+    elapsed = time.perf_counter() - start
+    leg.latency_ms = elapsed * 1000
+    record("order_leg", elapsed, error=leg.error, leg=leg.name, order_id=leg.order_id)
+    return leg
+
+
+def _submit(leg: OrderLeg, send):
+    # Run in the caller's context so the leg's span keeps the decision's trace ID
+    return _protective_pool.submit(contextvars.copy_context().run, _place, leg, send)
+
+
+def _protective_params(trigger_price: float, trigger_direction: int) -> dict:
+    return {
+        "stopPrice": trigger_price,
+        "reduceOnly": True,
+        "triggerDirection": trigger_direction,
+        "category": "linear",
+        "orderType": "Market",
+        "triggerBy": "MarkPrice"
+    }
+
+
+def _fetch_entry(exchange, symbol: str, entry: OrderLeg) -> Optional[dict]:
+    try:
+        # Bybit unified accounts refuse fetch_order without acknowledging it only sees the last 500 orders
+        return exchange.fetch_order(entry.order_id, symbol, {"acknowledged": True})
+    except Exception as e:
+        logging.error(f"Rollback: failed to fetch entry {entry.order_id}: {e}")
+        return None
+
+
+def _rollback(exchange, symbol: str, side: str, amount: float, result: ExecutionResult):
+    """
+    Undo a half-protected entry: cancel placed protective legs and the entry, then flatten
+    whatever the entry actually filled, as reported by the exchange, never the requested amount.
+    """
+    entry = result.legs[0]
+    for leg in result.legs[1:]:
+        if leg.status == "placed":
+            try:
+                exchange.cancel_order(leg.order_id, symbol)
+                leg.status = "cancelled"
+            except Exception as e:
+                logging.error(f"Rollback: failed to cancel {leg.name} {leg.order_id}: {e}")
+    for attempt in range(ROLLBACK_CANCEL_ATTEMPTS):
+        try:
+            exchange.cancel_order(entry.order_id, symbol)
+            entry.status = "cancelled"
+            break
+        except Exception as e:
+            logging.error(f"Rollback: cancel entry {entry.order_id} failed ({e}), attempt {attempt + 1}")
+            order = _fetch_entry(exchange, symbol, entry)
+            if order is not None and order.get('status') != 'open':
+                break  # Filled or already gone; nothing left to cancel
+            if attempt + 1 < ROLLBACK_CANCEL_ATTEMPTS:
+                time.sleep(ROLLBACK_CANCEL_BACKOFF * 2 ** attempt)
+    # Fills can land before the cancel, so check even when it succeeded
+    order = _fetch_entry(exchange, symbol, entry)
+    if order is None:
+        logging.error(f"Rollback: fill of entry {entry.order_id} unknown; not flattening, check the {symbol} position")
+        result.error = f"{result.error}; entry {entry.order_id} state unknown after rollback"
+        return
+    if entry.status != "cancelled" and order.get('status') == 'open':
+        # Its TP/SL are already gone, so a later fill would be unprotected
+        logging.error(f"Rollback: entry {entry.order_id} is still open without protection; cancel it manually")
+        result.error = f"{result.error}; entry {entry.order_id} still open without TP/SL after rollback"
+    filled = float(order.get('filled') or 0)
+    if filled > 0:
+        logging.error(f"Rollback: entry {entry.order_id} filled {filled} of {amount}; flattening")
+        close_side = "sell" if side == "buy" else "buy"
+        flatten = _place(OrderLeg("flatten"), lambda: exchange.create_order(
+            symbol, "market", close_side, filled, None, {"reduceOnly": True}))
+        result.legs.append(flatten)
+
+
+def place_protected_entry(exchange, symbol: str, signal: str, amount: float, entry_price: float,
+                          stop_loss: float, take_profit: float) -> ExecutionResult:
+    """
+    Place a limit entry with its take-profit and stop-loss, minimising the time the
+    position is unprotected. Never raises; failures are reported per leg.
+    """
+    side = "buy" if signal == "BUY" else "sell"
+    attach = ATTACH_TPSL and exchange.has.get('createOrderWithTakeProfitAndStopLoss')
+    result = ExecutionResult(symbol, side, amount, "attached" if attach else "separate")
+    started = time.perf_counter()
+
+    if attach:
+        entry = _place(OrderLeg("entry", entry_price), lambda: exchange.create_order(
+            symbol, "limit", side, amount, entry_price, {
+                "takeProfit": {"triggerPrice": take_profit},
+                "stopLoss": {"triggerPrice": stop_loss},
+                "tpTriggerBy": "MarkPrice",
+                "slTriggerBy": "MarkPrice",
+            }))
+        result.legs.append(entry)
+        result.ok = entry.status == "placed"
+        if result.ok:
+            result.protection_latency_ms = entry.latency_ms
+            record("entry_to_protection", entry.latency_ms / 1000)
+        else:
+            result.error = entry.error
+        return result
+
+    entry = _place(OrderLeg("entry", entry_price), lambda: exchange.create_order(
+        symbol, "limit", side, amount, entry_price))
+    result.legs.append(entry)
+    if entry.status != "placed":
+        result.error = entry.error
+        return result
+
+    position_side = "sell" if side == "buy" else "buy"
+    # triggerDirection: 1 = triggers when price rises above, 2 = when it falls below
+    tp_trigger, sl_trigger = (1, 2) if side == "buy" else (2, 1)
+    tp = _submit(OrderLeg("take_profit", take_profit), lambda: exchange.create_order(
+        symbol, "TAKE_PROFIT_MARKET", position_side, amount, None, _protective_params(take_profit, tp_trigger)))
+    sl = _submit(OrderLeg("stop_loss", stop_loss), lambda: exchange.create_order(
+        symbol, "STOP_MARKET", position_side, amount, None, _protective_params(stop_loss, sl_trigger)))
+    result.legs.extend([tp.result(), sl.result()])
+    result.protection_latency_ms = (time.perf_counter() - started) * 1000
+    record("entry_to_protection", result.protection_latency_ms / 1000)
+
+    failed = [leg for leg in result.legs[1:] if leg.status == "failed"]
+    if failed:
+        result.error = "; ".join(f"{leg.name}: {leg.error}" for leg in failed)
+        _rollback(exchange, symbol, side, amount, result)
+        return result
+    result.ok = True
+    return result
@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+DAY_MS = 86_400_000
+# Book levels kept per side, and how many of them the imbalance sums
+BOOK_DEPTH = 25
+IMBALANCE_LEVELS = 5
+# Rolling trade-flow window and ring size (trades); the ring must hold a busy window
+FLOW_WINDOW_MS = 60_000
+TRADE_CAPACITY = 1 << 16
+EXPIRE_CHUNK = 256
+# Features older than this are reported as missing rather than stale
+MAX_FEATURE_AGE_MS = 10_000
+
+FEATURE_FIELDS = ['book_imbalance', 'microprice', 'spread_bps', 'session_vwap', 'volume_delta',
+                  'volume_delta_window', 'buy_ratio_window']
+
+
+class OrderBookState:
+    """Top-of-book levels in one preallocated (side, level, price/amount) array, overwritten in place."""
+
+    def __init__(self, depth: int = BOOK_DEPTH, imbalance_levels: int = IMBALANCE_LEVELS):
+        self.depth = depth
+        self.imbalance_levels = imbalance_levels
+        self.levels = np.zeros((2, depth, 2))
+        self.counts = [0, 0]
+        self.timestamp = 0
+
+    def update(self, bids, asks, timestamp: Optional[int] = None):
+        """Apply a ccxt order book snapshot (lists of [price, amount, ...], best first)."""
+        for side, rows in enumerate((bids, asks)):
+            n = min(len(rows), self.depth)
+            if n:
+                self.levels[side, :n] = [row[:2] for row in rows[:n]]
+            self.counts[side] = n
+        self.timestamp = int(timestamp or time.time() * 1000)
+
+    def features(self) -> dict:
+        if not (self.counts[0] and self.counts[1]):
+            return {'book_imbalance': None, 'microprice': None, 'spread_bps': None}
+        (bid, bid_size), (ask, ask_size) = self.levels[0, 0], self.levels[1, 0]
+        k = self.imbalance_levels
+        bid_depth = self.levels[0, :min(k, self.counts[0]), 1].sum()
+        ask_depth = self.levels[1, :min(k, self.counts[1]), 1].sum()
+        mid = (bid + ask) / 2
+        return {
+            # +1 = all resting size on the bid, -1 = all on the ask
+            'book_imbalance': float((bid_depth - ask_depth) / (bid_depth + ask_depth)),
+            # Size-weighted mid: leans toward the side that is about to be taken out
+            'microprice': float((ask * bid_size + bid * ask_size) / (bid_size + ask_size)),
+            'spread_bps': float((ask - bid) / mid * 1e4),
+        }
+
+
+class TradeFlow:
+    """
+    Public trades in preallocated ring arrays with incrementally maintained sums:
+    session-anchored VWAP and volume delta (reset at 00:00 UTC) and a rolling-window delta.
+    Each trade is added and expired exactly once, in NumPy batches.
+    """
+
+    def __init__(self, window_ms: int = FLOW_WINDOW_MS, capacity: int = TRADE_CAPACITY):
+        self.window_ms = window_ms
+        self.capacity = capacity
+        self.ts = np.zeros(capacity, dtype=np.int64)
+        self.signed = np.zeros(capacity)  # +amount for taker buys, -amount for taker sells
+        self.head = 0  # Trades ever added
+        self.tail = 0  # Oldest trade still inside the window
+        self.window_delta = 0.0
+        self.window_volume = 0.0
+        self.window_buy_volume = 0.0
+        self.window_dropped = 0  # Trades pushed out of the ring before their window ended
+        self.session_start = None
+        self.session_pv = 0.0
+        self.session_volume = 0.0
+        self.session_delta = 0.0
+        self.last_ts = 0
+
+    def _expire(self, count: int):
+        idx = (self.tail + np.arange(count)) % self.capacity
+        signed = self.signed[idx]
+        self.window_delta -= signed.sum()
+        self.window_volume -= np.abs(signed).sum()
+        self.window_buy_volume -= signed[signed > 0].sum()
+        self.tail += count
+
+    def expire(self, now_ms: int):
+        cutoff = now_ms - self.window_ms
+        while self.tail < self.head:
+            n = min(EXPIRE_CHUNK, self.head - self.tail)
+            ts = self.ts[(self.tail + np.arange(n)) % self.capacity]
+            count = int(np.searchsorted(ts, cutoff, side='right'))
+            if count:
+                self._expire(count)
+            if count < n:
+                break
+
+    def _add_session(self, ts, price, signed):
+        volume = np.abs(signed)
+        session = int(ts[0]) // DAY_MS * DAY_MS
+        if session != self.session_start:
+            self.session_start = session
+            self.session_pv = self.session_volume = self.session_delta = 0.0
+        self.session_pv += float(price @ volume)
+        self.session_volume += float(volume.sum())
+        self.session_delta += float(signed.sum())
+
+    def add(self, ts: np.ndarray, price: np.ndarray, signed: np.ndarray):
+        """Add a batch of trades (timestamps ms, prices, signed amounts) in arrival order."""
+        if not len(ts):
+            return
+        # Session totals see every trade, even those the ring cannot hold
+        sessions = ts // DAY_MS
+        for start, end in _runs(sessions):
+            self._add_session(ts[start:end], price[start:end], signed[start:end])
+        # Ring smaller than the window: the oldest trades leave the window features early
+        truncated = max(0, len(ts) - self.capacity)
+        dropped = int((ts[:truncated] > max(self.last_ts, int(ts[-1])) - self.window_ms).sum())
+        ts, signed = ts[truncated:], signed[truncated:]
+        overflow = self.head + len(ts) - self.tail - self.capacity
+        if overflow > 0:
+            self._expire(overflow)
+            dropped += overflow
+        if dropped:
+            self.window_dropped += dropped
+            logging.warning(f"Trade ring of {self.capacity} overflowed: {dropped} trades left the window early "
+                            f"({self.window_dropped} so far)")
+        idx = (self.head + np.arange(len(ts))) % self.capacity
+        self.ts[idx] = ts
+        self.signed[idx] = signed
+        self.head += len(ts)
+        self.window_delta += float(signed.sum())
+        self.window_volume += float(np.abs(signed).sum())
+        self.window_buy_volume += float(signed[signed > 0].sum())
+        self.last_ts = max(self.last_ts, int(ts[-1]))
+        self.expire(self.last_ts)
+
+    def add_trades(self, trades: List[dict]):
+        """Add ccxt unified trades."""
+        if not trades:
+            return
+        rows = np.array([(t['timestamp'], t['price'], t['amount'] if t.get('side') == 'buy' else -t['amount'])
+                         for t in trades], dtype=float)
+        self.add(rows[:, 0].astype(np.int64), rows[:, 1], rows[:, 2])
+
+    def features(self) -> dict:
+        return {
+            'session_vwap': self.session_pv / self.session_volume if self.session_volume else None,
+            'volume_delta': self.session_delta if self.session_start is not None else None,
+            'volume_delta_window': self.window_delta if self.head else None,
+            'buy_ratio_window': self.window_buy_volume / self.window_volume if self.window_volume > 0 else None,
+        }
+
+
+def _runs(values: np.ndarray):
+    """(start, end) index pairs of runs of equal values."""
+    edges = np.flatnonzero(np.diff(values)) + 1
+    bounds = np.r_[0, edges, len(values)]
+    return zip(bounds[:-1], bounds[1:])
+
+
+class OrderFlowCollector:
+    """
+    Feeds OrderBookState and TradeFlow per symbol from ccxt.pro watch_order_book / watch_trades.
+    Runs its own event loop in a daemon thread so the threaded ETL can read features at any time.
+    """
+
+    def __init__(self, exchange, symbols: List[str], depth: int = BOOK_DEPTH):
+        self.exchange = exchange
+        self.symbols = list(symbols)
+        self.depth = depth
+        self.books: Dict[str, OrderBookState] = {s: OrderBookState(depth) for s in self.symbols}
+        self.flows: Dict[str, TradeFlow] = {s: TradeFlow() for s in self.symbols}
+        self._locks = {s: threading.Lock() for s in self.symbols}
+        self._loop = None
+        self._thread = None
+
+    def apply_book(self, symbol: str, book: dict):
+        with self._locks[symbol]:
+            self.books[symbol].update(book['bids'], book['asks'], book.get('timestamp'))
+
+    def apply_trades(self, symbol: str, trades: List[dict]):
+        with self._locks[symbol]:
+            self.flows[symbol].add_trades(trades)
+
+    def features(self, symbol: str, now_ms: Optional[int] = None) -> dict:
+        """Current order-flow features; fields are None when their feed is missing or older than MAX_FEATURE_AGE_MS."""
+        if symbol not in self.books:
+            return {}
+        now_ms = now_ms or int(time.time() * 1000)
+        with self._locks[symbol]:
+            book, flow = self.books[symbol], self.flows[symbol]
+            flow.expire(now_ms)
+            features = book.features() if now_ms - book.timestamp <= MAX_FEATURE_AGE_MS else {}
+            # The newest trade is the trade feed's heartbeat: once it is old, a silent or dead feed
+            # must read as missing, not as a frozen session VWAP or a balanced (0.0) window delta
+            if now_ms - flow.last_ts <= MAX_FEATURE_AGE_MS:
+                features.update(flow.features())
+        return {field: features.get(field) for field in FEATURE_FIELDS}
+
+    async def _watch(self, name, watch, apply):
+        backoff = 1.0
+        while True:
+            try:
+                apply(await watch())
+                backoff = 1.0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"{name} stream error: {e}; reconnecting in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    async def run(self):
+        tasks = []
+        for symbol in self.symbols:
+            tasks.append(asyncio.create_task(self._watch(
+                f"{symbol} order book", lambda s=symbol: self.exchange.watch_order_book(s, self.depth),
+                lambda book, s=symbol: self.apply_book(s, book))))
+            tasks.append(asyncio.create_task(self._watch(
+                f"{symbol} trades", lambda s=symbol: self.exchange.watch_trades(s),
+                lambda trades, s=symbol: self.apply_trades(s, trades))))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.exchange.close()
+
+    def start(self):
+        """Run the feeds in a background thread with its own event loop."""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self.run(),),
+                                        name="order-flow", daemon=True)
+        self._thread.start()
+
+
+_collector: Optional[OrderFlowCollector] = None
+
+
+def set_collector(collector: Optional[OrderFlowCollector]):
+    global _collector
+    _collector = collector
+
+
+def order_flow_features(symbol: str) -> dict:
+    """Features for the indicator snapshot; empty when no collector runs in this process."""
+    return _collector.features(symbol) if _collector is not None else {}
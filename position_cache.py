@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+
+@dataclass
+class PositionState:
+    symbol: str
+    size: float = 0.0
+    side: Optional[str] = None
+    entry_price: Optional[float] = None
+    updated_at: float = 0.0  # time.time() of the last stream event or REST reconciliation
+    source: str = "none"
+
+
+def _position_size(pos: dict) -> float:
+    size = pos.get('contracts')
+    if size is None:
+        size = pos.get('size') or 0
+    return abs(float(size))
+
+
+class PositionCache:
+    """
+    Position and open-order state kept current by the private account stream
+    (ccxt.pro watch_positions / watch_orders) with periodic REST reconciliation,
+    so the decision loop can check exposure without a REST round trip.
+    """
+
+    def __init__(self, exchange, symbols: List[str], reconcile_interval: float = 30.0, max_staleness: float = 90.0):
+        self.exchange = exchange
+        self.symbols = list(symbols)
+        self.reconcile_interval = reconcile_interval
+        self.max_staleness = max_staleness
+        self._positions: Dict[str, PositionState] = {}
+        self._open_orders: Dict[str, dict] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    # --- synchronous lookups -------------------------------------------------
+
+    def get(self, symbol: str) -> PositionState:
+        return self._positions.get(symbol) or PositionState(symbol)
+
+    def staleness(self, symbol: str, now: Optional[float] = None) -> float:
+        """Seconds since the symbol's state was last confirmed (inf if never)."""
+        state = self.get(symbol)
+        if not state.updated_at:
+            return float('inf')
+        return (now or time.time()) - state.updated_at
+
+    def in_position(self, symbol: str) -> bool:
+        """
+        True if there is an open position. Stale state counts as in position
+        (fail-safe against duplicate entries), same as a failed REST check did.
+        """
+        if self.staleness(symbol) > self.max_staleness:
+            return True
+        return self.get(symbol).size > 0
+
+    def open_orders(self, symbol: str) -> List[dict]:
+        return [o for o in self._open_orders.values() if o.get('symbol') == symbol]
+
+    # --- state updates -------------------------------------------------------
+
+    def apply_positions(self, positions: List[dict], source: str, full_snapshot: bool = False,
+                        now: Optional[float] = None, as_of: Optional[float] = None):
+        """
+        Merge position updates. A full snapshot also marks tracked symbols it omits as flat.
+        `as_of` is when a REST snapshot was requested; stream updates newer than that win.
+        """
+        now = now or time.time()
+        seen = set()
+        for pos in positions:
+            symbol = pos.get('symbol')
+            if not symbol:
+                continue
+            seen.add(symbol)
+            if self._is_newer_than(symbol, as_of):
+                continue
+            size = _position_size(pos)
+            self._positions[symbol] = PositionState(
+                symbol=symbol,
+                size=size,
+                side=pos.get('side') if size > 0 else None,
+                entry_price=pos.get('entryPrice'),
+                updated_at=now,
+                source=source,
+            )
+        if full_snapshot:
+            for symbol in self.symbols:
+                if symbol not in seen and not self._is_newer_than(symbol, as_of):
+                    self._positions[symbol] = PositionState(symbol, updated_at=now, source=source)
+
+    def _is_newer_than(self, symbol: str, as_of: Optional[float]) -> bool:
+        state = self._positions.get(symbol)
+        return as_of is not None and state is not None and state.updated_at > as_of
+
+    def apply_orders(self, orders: List[dict]):
+        for order in orders:
+            order_id = order.get('id')
+            if not order_id:
+                continue
+            if order.get('status') == 'open':
+                self._open_orders[order_id] = order
+            else:
+                self._open_orders.pop(order_id, None)
+
+    # --- background feeds ----------------------------------------------------
+
+    async def reconcile(self):
+        requested_at = time.time()
+        positions = await self.exchange.fetch_positions(self.symbols)
+        self.apply_positions(positions, source="rest", full_snapshot=True, as_of=requested_at)
+        open_orders = []
+        for symbol in self.symbols:
+            open_orders.extend(await self.exchange.fetch_open_orders(symbol))
+        self._open_orders = {o['id']: o for o in open_orders if o.get('id')}
+
+    async def _reconcile_loop(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logging.warning(f"Position reconciliation failed: {e}")
+
+    async def _watch(self, name, watch, apply):
+        backoff = 1.0
+        while True:
+            try:
+                updates = await watch()
+                apply(updates)
+                backoff = 1.0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"{name} stream error: {e}; reconnecting in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    async def start(self):
+        """Reconcile once so lookups are valid immediately, then keep the feeds running."""
+        try:
+            await self.reconcile()
+        except Exception as e:
+            logging.warning(f"Initial position reconciliation failed: {e}")
+        self._tasks = [
+            asyncio.create_task(self._watch(
+                "Position", lambda: self.exchange.watch_positions(self.symbols),
+                lambda updates: self.apply_positions(updates, source="stream"))),
+            asyncio.create_task(self._watch(
+                "Order", lambda: self.exchange.watch_orders(),
+                self.apply_orders)),
+            asyncio.create_task(self._reconcile_loop()),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.exchange.close()
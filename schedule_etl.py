@@ -1,13 +1,22 @@
-import schedule
 import time
-import subprocess
-import sys
 import os
 import logging
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from candle_clock import next_candle_close, closed_timeframes
+from etl_to_timescaledb import ensure_table_exists, run_etl, SYMBOLS, TIMEFRAMES
+from tracing import start_metrics_server, write_prometheus
+from order_flow import OrderFlowCollector, set_collector
+from trade_utils import exchange_config
+import ccxt.pro as ccxtpro
 
-ETL_SCRIPT = os.path.join(os.path.dirname(__file__), "etl_to_timescaledb.py")
-PYTHON_EXEC = sys.executable  # Use the current Python interpreter
+# Seconds to wait after a candle boundary so the exchange has sealed the closed candle
+ETL_CLOSE_DELAY_SECONDS = float(os.getenv("ETL_CLOSE_DELAY_SECONDS", "1.5"))
+# Symbols refreshed in parallel; each symbol's notify goes out as soon as that symbol is stored
+ETL_WORKERS = int(os.getenv("ETL_WORKERS", "8"))
+# Stream L2 books and public trades so 1m snapshots carry real order-flow features
+ORDER_FLOW = os.getenv("ORDER_FLOW", "false").lower() == "true"
+# node_exporter textfile-collector path; rewritten with the latency histograms after every ETL job
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE")
 
 logging.basicConfig(
     level=logging.INFO,
@@ -15,25 +24,39 @@ logging.basicConfig(
     handlers=[logging.StreamHandler()]
 )
 
-def job():
-    logging.info("Running ETL job: etl_to_timescaledb.py")
+def run_symbol(symbol, timeframes):
     try:
-        result = subprocess.run([PYTHON_EXEC, ETL_SCRIPT], capture_output=True, text=True, timeout=300)
-        if result.stdout:
-            logging.info("[ETL STDOUT] %s", result.stdout.strip())
-        if result.stderr:
-            logging.error("[ETL STDERR] %s", result.stderr.strip())
-        if result.returncode != 0:
-            logging.error(f"ETL script exited with code {result.returncode}")
-    except subprocess.TimeoutExpired:
-        logging.error("ETL job timed out.")
+        return run_etl(timeframes, symbol)
     except Exception as e:
-        logging.exception(f"Unexpected error running ETL job: {e}")
+        logging.exception(f"Unexpected error running ETL job for {symbol}: {e}")
+        return []
 
-schedule.every(1).minutes.do(job)
+def job(timeframes, pool):
+    logging.info("Running ETL job for %d symbols, closed candles: %s", len(SYMBOLS), ", ".join(timeframes))
+    started = time.time()
+    results = list(pool.map(lambda symbol: run_symbol(symbol, timeframes), SYMBOLS))
+    logging.info("ETL stored %d/%d symbols in %.2fs", sum(1 for r in results if r), len(SYMBOLS), time.time() - started)
+    if METRICS_TEXTFILE:
+        try:
+            write_prometheus(METRICS_TEXTFILE)
+        except OSError as e:
+            logging.error(f"Failed to write metrics to {METRICS_TEXTFILE}: {e}")
 
-logging.info("Scheduler started. ETL job will run every 1 minute.")
-job()  # Run once at startup
-while True:
-    schedule.run_pending()
-    time.sleep(1)
+def main():
+    ensure_table_exists()
+    if os.getenv("METRICS_PORT"):
+        start_metrics_server(int(os.getenv("METRICS_PORT")))
+    if ORDER_FLOW:
+        collector = OrderFlowCollector(ccxtpro.bybit(exchange_config('linear', auth=False)), SYMBOLS)
+        collector.start()
+        set_collector(collector)
+    logging.info("Scheduler started. ETL runs on 1m candle closes; 5m/15m refresh only when their candles close.")
+    with ThreadPoolExecutor(max_workers=min(ETL_WORKERS, len(SYMBOLS))) as pool:
+        job(TIMEFRAMES, pool)  # Run once at startup
+        while True:
+            boundary = next_candle_close("1m")
+            time.sleep(max(0.0, boundary + ETL_CLOSE_DELAY_SECONDS - time.time()))
+            job(closed_timeframes(boundary, TIMEFRAMES), pool)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+import asyncio
+import itertools
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+import ccxt
+import numpy as np
+
+from candle_clock import TIMEFRAME_SECONDS
+
+BAR_MS = 60_000
+
+
+class SimExchange:
+    """
+    In-process stand-in for the ccxt Bybit client covering the calls this project makes
+    (load_markets, market, fetch_ohlcv, fetch_ticker, fetch_positions, fetch_open_orders,
+    create_order incl. trigger and attached TP/SL orders, cancel_order, fetch_order, set_leverage).
+    Prices follow a random walk advanced with step(); a simple matching engine fills
+    resting orders against each new 1m bar. Latency, rate limits and injected errors
+    raise the same ccxt exception types the live client would.
+    """
+
+    precisionMode = ccxt.TICK_SIZE
+
+    def __init__(self, symbols: List[str], history: int = 1000, start_price: float = 1.0,
+                 volatility: float = 0.002, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 rate_limit: Optional[float] = None, error_rate=0.0, attach_tpsl: bool = True,
+                 slippage_bps: float = 1.0, seed: int = 0):
+        self.symbols = list(symbols)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit  # requests per second; None = unlimited
+        self.error_rate = error_rate  # float for every call, or {method: probability}
+        self.slippage_bps = slippage_bps
+        self.volatility = volatility
+        self.has = {'createOrderWithTakeProfitAndStopLoss': attach_tpsl, 'fetchPositions': True}
+        self.markets = {}
+        self.calls = {}
+        self._rng = np.random.default_rng(seed)
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._tokens = rate_limit or 0.0
+        self._token_time = time.monotonic()
+        # Start aligned to a 15m boundary so every timeframe aggregates whole candles
+        self.start_ms = (int(time.time() * 1000) - history * BAR_MS) // (900 * 1000) * 900 * 1000
+        self._bars: Dict[str, List[list]] = {}
+        self._orders: Dict[str, dict] = {}
+        self._positions: Dict[str, dict] = {}
+        self.leverage: Dict[str, float] = {}
+        for symbol in self.symbols:
+            self.markets[symbol] = self._make_market(symbol)
+            self._bars[symbol] = []
+            self._positions[symbol] = {'symbol': symbol, 'contracts': 0.0, 'side': None, 'entryPrice': None}
+            self._extend(symbol, history, start_price)
+
+    # --- simulation control --------------------------------------------------
+
+    def _make_market(self, symbol: str) -> dict:
+        base = symbol.split('/')[0]
+        return {
+            'id': symbol.replace('/', '').split(':')[0],
+            'symbol': symbol,
+            'base': base,
+            'quote': 'USDT',
+            'type': 'swap',
+            'linear': True,
+            'precision': {'price': 0.0001, 'amount': 0.1},
+            'limits': {'amount': {'min': 0.1, 'max': 1_000_000}, 'cost': {'min': 5}, 'leverage': {'max': 50}},
+        }
+
+    def _extend(self, symbol: str, count: int, start_price: Optional[float] = None):
+        bars = self._bars[symbol]
+        price = bars[-1][4] if bars else start_price
+        ts = bars[-1][0] + BAR_MS if bars else self.start_ms
+        returns = self._rng.normal(0, self.volatility, (count, 4))
+        new = []
+        for i in range(count):
+            open_ = price
+            path = open_ * np.exp(np.cumsum(returns[i] / 2))
+            close = float(path[-1])
+            new.append([ts, open_, float(max(open_, path.max())), float(min(open_, path.min())), close,
+                        float(self._rng.uniform(100, 10_000))])
+            price = close
+            ts += BAR_MS
+        bars.extend(new)
+        return new
+
+    def step(self, bars: int = 1):
+        """Advance every symbol by `bars` 1m candles and match resting orders against them."""
+        with self._lock:
+            for symbol in self.symbols:
+                for bar in self._extend(symbol, bars):
+                    self._match(symbol, bar)
+
+    def now_ms(self) -> int:
+        """Simulated clock: close time of the newest bar."""
+        return self._bars[self.symbols[0]][-1][0] + BAR_MS
+
+    def call_counts(self) -> Dict[str, int]:
+        """Snapshot of calls per ccxt method, consistent while other threads keep calling."""
+        with self._lock:
+            return dict(self.calls)
+
+    def last_price(self, symbol: str) -> float:
+        return self._bars[symbol][-1][4]
+
+    # --- latency, rate limit and error injection -----------------------------
+
+    def _call(self, method: str):
+        with self._lock:
+            # Benchmarks call from thread pools; counts and the token bucket share the lock
+            self.calls[method] = self.calls.get(method, 0) + 1
+            if self.rate_limit:
+                now = time.monotonic()
+                self._tokens = min(self.rate_limit, self._tokens + (now - self._token_time) * self.rate_limit)
+                self._token_time = now
+                if self._tokens < 1:
+                    raise ccxt.RateLimitExceeded(f"sim {method}: rate limit of {self.rate_limit}/s exceeded")
+                self._tokens -= 1
+        if self.latency_ms or self.jitter_ms:
+            delay = self.latency_ms + (self._random.expovariate(1 / self.jitter_ms) if self.jitter_ms else 0)
+            time.sleep(delay / 1000)
+        rate = self.error_rate.get(method, 0.0) if isinstance(self.error_rate, dict) else self.error_rate
+        if rate and self._random.random() < rate:
+            raise ccxt.NetworkError(f"sim {method}: injected network error")
+
+    # --- ccxt surface ---------------------------------------------------------
+
+    def load_markets(self, reload: bool = False):
+        self._call('load_markets')
+        return self.markets
+
+    def market(self, symbol: str) -> dict:
+        if symbol not in self.markets:
+            raise ccxt.BadSymbol(f"sim does not have market symbol {symbol}")
+        return self.markets[symbol]
+
+    def set_leverage(self, leverage, symbol=None, params=None):
+        self._call('set_leverage')
+        self.leverage[symbol] = leverage
+        return {}
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        self._call('fetch_ohlcv')
+        self.market(symbol)
+        minutes = TIMEFRAME_SECONDS[timeframe] // 60
+        limit = limit or 200
+        with self._lock:
+            bars = self._bars[symbol]
+            # Include the still-forming higher-timeframe candle, like the exchange does
+            last_start = (len(bars) - 1) // minutes * minutes
+            first = max(last_start - (limit - 1) * minutes, 0)
+            if minutes == 1:
+                return [list(bar) for bar in bars[first:]]
+            window = np.asarray(bars[first:], dtype=float)
+        candles = []
+        for start in range(0, len(window), minutes):
+            chunk = window[start:start + minutes]
+            candles.append([int(chunk[0, 0]), chunk[0, 1], chunk[:, 2].max(), chunk[:, 3].min(), chunk[-1, 4], chunk[:, 5].sum()])
+        return candles[-limit:]
+
+    def fetch_ticker(self, symbol, params=None):
+        self._call('fetch_ticker')
+        bar = self._bars[self.market(symbol)['symbol']][-1]
+        return {'symbol': symbol, 'timestamp': bar[0], 'last': bar[4], 'close': bar[4],
+                'bid': bar[4] * 0.9999, 'ask': bar[4] * 1.0001, 'high': bar[2], 'low': bar[3]}
+
+    def fetch_positions(self, symbols=None, params=None):
+        self._call('fetch_positions')
+        with self._lock:
+            return [dict(self._positions[s]) for s in (symbols or self.symbols) if s in self._positions]
+
+    def fetch_open_orders(self, symbol=None, since=None, limit=None, params=None):
+        self._call('fetch_open_orders')
+        with self._lock:
+            return [dict(o) for o in self._orders.values() if o['status'] == 'open' and symbol in (None, o['symbol'])]
+
+    def cancel_order(self, id, symbol=None, params=None):
+        self._call('cancel_order')
+        with self._lock:
+            order = self._orders.get(id)
+            if order is None or order['status'] != 'open':
+                raise ccxt.OrderNotFound(f"sim order {id} is not open")
+            order['status'] = 'canceled'
+            return dict(order)
+
+    def fetch_order(self, id, symbol=None, params=None):
+        self._call('fetch_order')
+        with self._lock:
+            if id not in self._orders:
+                raise ccxt.OrderNotFound(f"sim order {id} not found")
+            return dict(self._orders[id])
+
+    def create_order(self, symbol, type, side, amount, price=None, params=None):
+        self._call('create_order')
+        params = dict(params or {})
+        self.market(symbol)
+        order_type = type.lower()
+        if amount <= 0:
+            raise ccxt.InvalidOrder(f"sim amount must be positive, got {amount}")
+        if order_type == 'limit' and not price:
+            raise ccxt.ArgumentsRequired("sim limit orders require a price")
+        trigger = params.get('stopPrice') or params.get('triggerPrice')
+        if order_type in ('take_profit_market', 'stop_market') and not trigger:
+            raise ccxt.ArgumentsRequired(f"sim {type} requires stopPrice/triggerPrice")
+        order = {
+            'id': str(next(self._ids)),
+            'symbol': symbol,
+            'type': order_type,
+            'side': side,
+            'amount': float(amount),
+            'price': price,
+            'triggerPrice': trigger,
+            'triggerDirection': params.get('triggerDirection'),
+            'reduceOnly': bool(params.get('reduceOnly')),
+            'takeProfit': (params.get('takeProfit') or {}).get('triggerPrice'),
+            'stopLoss': (params.get('stopLoss') or {}).get('triggerPrice'),
+            'status': 'open',
+            'filled': 0.0,
+            'timestamp': self.now_ms(),
+        }
+        with self._lock:
+            if order['reduceOnly'] and self._positions[symbol]['contracts'] == 0 and not trigger:
+                raise ccxt.InvalidOrder("sim reduce-only order with no open position")
+            self._orders[order['id']] = order
+            if order_type == 'market':
+                self._fill(order, self.last_price(symbol), market=True)
+        return dict(order)
+
+    def close(self):
+        pass
+
+    # --- matching engine ------------------------------------------------------
+
+    def _fill(self, order: dict, price: float, market: bool = False):
+        symbol = order['symbol']
+        if market:
+            price *= 1 + (1 if order['side'] == 'buy' else -1) * self.slippage_bps / 10000
+        pos = self._positions[symbol]
+        signed = pos['contracts'] * (1 if pos['side'] == 'long' else -1)
+        delta = order['amount'] * (1 if order['side'] == 'buy' else -1)
+        if order['reduceOnly']:
+            # Reduce-only never flips or grows the position
+            delta = max(-abs(signed), min(abs(signed), delta)) if signed * delta < 0 else 0.0
+        new = signed + delta
+        if new == 0:
+            pos.update(contracts=0.0, side=None, entryPrice=None)
+        elif signed == 0 or signed * delta > 0:
+            entry = pos['entryPrice'] or price
+            pos.update(contracts=abs(new), side='long' if new > 0 else 'short',
+                       entryPrice=(abs(signed) * entry + abs(delta) * price) / abs(new))
+        else:
+            pos.update(contracts=abs(new), side='long' if new > 0 else 'short')
+        order.update(status='closed', filled=abs(delta), average=price)
+        if order.get('takeProfit') or order.get('stopLoss'):
+            self._attach_protection(order)
+        if pos['contracts'] == 0:
+            # Position-level TP/SL disappear once the position is flat
+            for other in self._orders.values():
+                if other['symbol'] == symbol and other['status'] == 'open' and other['reduceOnly']:
+                    other['status'] = 'canceled'
+
+    def _attach_protection(self, entry: dict):
+        close_side = 'sell' if entry['side'] == 'buy' else 'buy'
+        long = entry['side'] == 'buy'
+        for kind, trigger in (('take_profit_market', entry['takeProfit']), ('stop_market', entry['stopLoss'])):
+            if trigger is None:
+                continue
+            rising = (kind == 'take_profit_market') == long
+            order_id = str(next(self._ids))
+            self._orders[order_id] = {
+                'id': order_id, 'symbol': entry['symbol'], 'type': kind, 'side': close_side,
+                'amount': entry['amount'], 'price': None, 'triggerPrice': trigger,
+                'triggerDirection': 1 if rising else 2, 'reduceOnly': True, 'takeProfit': None,
+                'stopLoss': None, 'status': 'open', 'filled': 0.0, 'timestamp': entry['timestamp'],
+            }
+
+    def _match(self, symbol: str, bar: list):
+        _, _, high, low, _, _ = bar
+        for order in list(self._orders.values()):
+            if order['symbol'] != symbol or order['status'] != 'open':
+                continue
+            if order['type'] == 'limit':
+                if (order['side'] == 'buy' and low <= order['price']) or (order['side'] == 'sell' and high >= order['price']):
+                    self._fill(order, order['price'])
+            elif order['triggerPrice'] is not None:
+                trigger = order['triggerPrice']
+                if (order['triggerDirection'] == 1 and high >= trigger) or (order['triggerDirection'] == 2 and low <= trigger):
+                    if self._positions[symbol]['contracts'] == 0:
+                        order['status'] = 'canceled'
+                    else:
+                        self._fill(order, trigger, market=True)
+
+
+class AsyncSimExchange:
+    """ccxt.pro-style async facade over a SimExchange, with position/order watch streams."""
+
+    def __init__(self, sim: SimExchange, poll_interval: float = 0.05):
+        self.sim = sim
+        self.poll_interval = poll_interval
+        self._seen_positions = {}
+        self._seen_orders = {}
+
+    async def fetch_positions(self, symbols=None, params=None):
+        return await asyncio.to_thread(self.sim.fetch_positions, symbols)
+
+    async def fetch_open_orders(self, symbol=None, since=None, limit=None, params=None):
+        return await asyncio.to_thread(self.sim.fetch_open_orders, symbol)
+
+    async def watch_positions(self, symbols=None, since=None, limit=None, params=None):
+        """Resolve with the positions that changed since the previous call."""
+        while True:
+            with self.sim._lock:
+                current = {s: dict(p) for s, p in self.sim._positions.items() if not symbols or s in symbols}
+            changed = [p for s, p in current.items() if self._seen_positions.get(s) != p]
+            self._seen_positions.update(current)
+            if changed:
+                return changed
+            await asyncio.sleep(self.poll_interval)
+
+    async def watch_orders(self, symbol=None, since=None, limit=None, params=None):
+        while True:
+            with self.sim._lock:
+                current = {i: dict(o) for i, o in self.sim._orders.items()}
+            changed = [o for i, o in current.items() if self._seen_orders.get(i, {}).get('status') != o['status']]
+            self._seen_orders.update(current)
+            if changed:
+                return changed
+            await asyncio.sleep(self.poll_interval)
+
+    async def close(self):
+        pass
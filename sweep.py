@@ -0,0 +1,173 @@
+import argparse
+import heapq
+import itertools
+import json
+import logging
+import math
+import os
+import random
+import time
+from dataclasses import asdict, fields
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from backtest import BacktestConfig, StrategyParams, load_candles, run_backtest, timeframe_frames
+
+# Hand-picked constants from the TechnicalAnalyst prompt and compute_indicators, with neighbours to try
+DEFAULT_SPACE = {
+    'adx_min': [15.0, 20.0, 25.0],
+    'rsi_buy': [40.0, 45.0, 50.0],
+    'rsi_sell': [50.0, 55.0, 60.0],
+    'sl_atr': [1.0, 1.5, 2.0],
+    'tp_atr': [1.5, 2.0, 3.0],
+    'confirm_weight': [6.0, 8.0, 10.0],
+    'conflict_weight': [3.0, 5.0, 7.0],
+    'ema_fast': [5, 8, 13],
+    'ema_slow': [21, 34],
+    'bb_length': [20, 30],
+    'bb_std': [2.0, 2.5],
+    'swing_n': [10, 20],
+}
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+# Indicator frames cached per worker; distinct indicator settings are few compared to thresholds
+FRAME_CACHE_SIZE = 8
+
+# Per-worker state, set by _init_worker
+_candles = None
+_shm = None
+_frame_cache = {}
+
+
+def grid_search(space: dict):
+    names = list(space)
+    for values in itertools.product(*(space[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def random_search(space: dict, samples: int, seed: int = 0):
+    rng = random.Random(seed)
+    seen = set()
+    total = math.prod(len(values) for values in space.values())
+    while len(seen) < min(samples, total):
+        combo = {name: rng.choice(values) for name, values in space.items()}
+        key = tuple(combo.values())
+        if key not in seen:
+            seen.add(key)
+            yield combo
+
+
+def share_candles(candles: pd.DataFrame):
+    """Copy OHLCV and timestamps into one shared-memory block; returns (shm, layout) for workers."""
+    n = len(candles)
+    shm = shared_memory.SharedMemory(create=True, size=n * 8 * (len(OHLCV_COLUMNS) + 1))
+    values = np.ndarray((len(OHLCV_COLUMNS), n), dtype=np.float64, buffer=shm.buf)
+    values[:] = candles[OHLCV_COLUMNS].to_numpy(np.float64).T
+    stamps = np.ndarray((n,), dtype=np.int64, buffer=shm.buf, offset=values.nbytes)
+    stamps[:] = candles.index.as_unit('ns').asi8
+    return shm, {'name': shm.name, 'rows': n, 'tz': str(candles.index.tz) if candles.index.tz else None}
+
+
+def _init_worker(layout: dict):
+    global _candles, _shm
+    _shm = shared_memory.SharedMemory(name=layout['name'])
+    n = layout['rows']
+    values = np.ndarray((len(OHLCV_COLUMNS), n), dtype=np.float64, buffer=_shm.buf)
+    stamps = np.ndarray((n,), dtype=np.int64, buffer=_shm.buf, offset=values.nbytes)
+    index = pd.DatetimeIndex(stamps.view('datetime64[ns]'))
+    if layout['tz']:
+        index = index.tz_localize('UTC').tz_convert(layout['tz'])
+    # Read-only view over the shared block; pandas keeps the (columns x rows) array as its block
+    values.flags.writeable = False
+    _candles = pd.DataFrame(values.T, columns=OHLCV_COLUMNS, index=index, copy=False)
+
+
+def _frames_for(params: StrategyParams) -> dict:
+    key = tuple(sorted(params.indicator_params().items()))
+    if key not in _frame_cache:
+        if len(_frame_cache) >= FRAME_CACHE_SIZE:
+            _frame_cache.pop(next(iter(_frame_cache)))
+        _frame_cache[key] = timeframe_frames(_candles, params)
+    return _frame_cache[key]
+
+
+def _evaluate(task):
+    combo, config = task
+    params = StrategyParams(**combo)
+    started = time.perf_counter()
+    _, stats = run_backtest(_candles, params, config, frames=_frames_for(params))
+    stats['seconds'] = time.perf_counter() - started
+    return combo, stats
+
+
+def _indicator_key(combo: dict):
+    defaults = StrategyParams()
+    return tuple(combo.get(name, getattr(defaults, name)) for name in StrategyParams().indicator_params())
+
+
+def run_sweep(candles: pd.DataFrame, combos, config: BacktestConfig = None, workers: int = None,
+              metric: str = 'total_pnl', min_trades: int = 20, top: int = 20, out_path: str = None):
+    """
+    Evaluate parameter combos across a process pool. Candles are shared, not pickled per
+    task; results stream to `out_path` (JSONL) and a running top-N by `metric`.
+    """
+    config = config or BacktestConfig()
+    valid = {f.name for f in fields(StrategyParams)}
+    # Group by indicator settings so each worker reuses its cached frames
+    combos = sorted(combos, key=_indicator_key)
+    for combo in combos:
+        unknown = set(combo) - valid
+        if unknown:
+            raise ValueError(f"Unknown strategy parameters: {sorted(unknown)}")
+    shm, layout = share_candles(candles)
+    ranked = []
+    out = open(out_path, 'a') if out_path else None
+    try:
+        with Pool(workers or os.cpu_count(), initializer=_init_worker, initargs=(layout,)) as pool:
+            tasks = ((combo, config) for combo in combos)
+            chunksize = max(1, len(combos) // ((workers or os.cpu_count()) * 4))
+            for done, (combo, stats) in enumerate(pool.imap_unordered(_evaluate, tasks, chunksize=chunksize), 1):
+                if out:
+                    out.write(json.dumps({'params': combo, 'stats': stats}) + "\n")
+                    out.flush()
+                score = stats.get(metric, float('nan'))
+                if stats['trades'] >= min_trades and not math.isnan(score):
+                    entry = (score, done, combo, stats)
+                    if len(ranked) < top:
+                        heapq.heappush(ranked, entry)
+                    else:
+                        heapq.heappushpop(ranked, entry)
+                if done % 10 == 0 or done == len(combos):
+                    best = max(ranked)[0] if ranked else float('nan')
+                    logging.info(f"{done}/{len(combos)} combos evaluated, best {metric}={best:.4f}")
+    finally:
+        if out:
+            out.close()
+        shm.close()
+        shm.unlink()
+    return [(combo, stats) for _, _, combo, stats in sorted(ranked, reverse=True)]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    parser = argparse.ArgumentParser(description="Sweep TechnicalAnalyst thresholds over stored 1m candles.")
+    parser.add_argument("csv", help="1m OHLCV CSV written by fetch_core_5m.py")
+    parser.add_argument("--samples", type=int, default=200, help="random combos to try; 0 for the full grid")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--metric", default="total_pnl")
+    parser.add_argument("--min-trades", type=int, default=20)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", default="sweep_results.jsonl")
+    args = parser.parse_args()
+
+    candles = load_candles(args.csv)
+    combos = list(grid_search(DEFAULT_SPACE) if args.samples == 0 else random_search(DEFAULT_SPACE, args.samples))
+    started = time.perf_counter()
+    ranked = run_sweep(candles, combos, workers=args.workers, metric=args.metric,
+                       min_trades=args.min_trades, top=args.top, out_path=args.out)
+    logging.info(f"Swept {len(combos)} combos over {len(candles)} bars in {time.perf_counter() - started:.1f}s")
+    for rank, (combo, stats) in enumerate(ranked, 1):
+        print(f"#{rank:<3} {args.metric}={stats[args.metric]:.4f} trades={stats['trades']} "
+              f"win_rate={stats['win_rate']:.2%} max_dd={stats['max_drawdown_pct']:.1f}% {json.dumps(combo)}")
+    print("defaults:", json.dumps(asdict(StrategyParams())))
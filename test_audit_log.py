@@ -0,0 +1,144 @@
+import tempfile
+import threading
+import time
+import json
+import os
+from audit_log import AuditLog, FileSink, query, replay, snapshot_hash
+from etl_benchmark import SQLiteStandIn
+from tracing import new_trace
+
+class SlowSink:
+    """Sink that blocks until released, to fill the queue."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.batches = []
+
+    def write(self, batch):
+        self.release.wait()
+        self.batches.append(batch)
+
+class BrokenSink:
+    def write(self, batch):
+        raise OSError("disk full")
+
+def test_events_round_trip_and_replay():
+    """
+    Events written from several threads land in columnar segments and can be filtered and
+    replayed per trace, with the trace ID picked up from the caller's context.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        log = AuditLog(FileSink(tmp), batch_size=4, flush_interval=0.05)
+        snapshot = {"v": 2, "cols": ["t", "c"], "rows": {"1m": [1, 0.5]}}
+
+        def decision(symbol, trace):
+            new_trace(trace)
+            log.log("input", symbol, tool="get_indicator_table", hash=snapshot_hash(snapshot), snapshot=snapshot)
+            log.log("order", symbol, request={"signal": "BUY"}, result={"ok": True, "legs": [{"order_id": "1"}]})
+            log.log("decision", symbol, output='{"signal": "BUY"}')
+
+        threads = [threading.Thread(target=decision, args=(f"S{i}/USDT:USDT", f"trace{i}")) for i in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        log.close()
+
+        assert len(query(tmp)) == 15
+        assert [e['symbol'] for e in query(tmp, kind="order", symbol="S3/USDT:USDT")] == ["S3/USDT:USDT"]
+        assert query(tmp, start=time.time() + 60) == []
+        timeline = replay("trace2", tmp)
+        assert timeline['symbol'] == "S2/USDT:USDT"
+        assert timeline['inputs'][0]['payload']['hash'] == snapshot_hash(snapshot)
+        assert timeline['inputs'][0]['payload']['snapshot'] == snapshot
+        assert timeline['orders'][0]['payload']['result']['legs'][0]['order_id'] == "1"
+        assert timeline['decision']['payload']['output'] == '{"signal": "BUY"}'
+        assert [e['kind'] for e in timeline['events']] == ["input", "order", "decision"]
+
+def test_logging_never_blocks_the_caller():
+    """
+    A stalled sink fills the queue; further events are dropped and counted, not waited on,
+    and a failing sink is reported without raising.
+    """
+    sink = SlowSink()
+    log = AuditLog(sink, batch_size=1, flush_interval=0.01, queue_size=10)
+    started = time.perf_counter()
+    for i in range(100):
+        log.log("order", "X/USDT:USDT", n=i)
+    assert time.perf_counter() - started < 0.5
+    assert log.dropped > 0
+    sink.release.set()
+    log.close()
+    assert sum(len(b) for b in sink.batches) + log.dropped == 100
+
+    broken = AuditLog(BrokenSink(), batch_size=1)
+    broken.log("order", "X/USDT:USDT")
+    broken.close()
+    assert broken.failed_batches == 1
+
+def test_payloads_are_captured_at_log_time():
+    """
+    The payload is serialized when logged: later mutation by the caller does not leak in, NaN is
+    stored as null, and an unserializable payload is counted without stopping the writer.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        log = AuditLog(FileSink(tmp), batch_size=100, flush_interval=0.05)
+        request = {'signal': 'BUY', 'legs': []}
+        log.log("order", "X/USDT:USDT", request=request)
+        request['signal'] = 'SELL'
+        request['legs'].append({'order_id': '9'})
+        circular = {}
+        circular['self'] = circular
+        log.log("input", "X/USDT:USDT", snapshot=circular)
+        log.log("input", "X/USDT:USDT", snapshot={'atr': float('nan'), 'rows': [1.0, float('inf')]})
+        log.close()
+        assert log.rejected == 1 and log.failed_batches == 0
+        order, snapshot = query(tmp)
+        assert order['payload']['request'] == {'signal': 'BUY', 'legs': []}
+        assert snapshot['payload']['snapshot'] == {'atr': None, 'rows': [1.0, None]}
+
+def test_payload_keys_do_not_shadow_columns():
+    """
+    A payload key named like an event column stays inside the payload.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        log = AuditLog(FileSink(tmp), flush_interval=0.01)
+        log.log("order", "X/USDT:USDT", trace_id="t1", ts=0, payload="exchange echo")
+        log.close()
+        (event,) = query(tmp)
+        assert (event['kind'], event['symbol'], event['trace_id']) == ("order", "X/USDT:USDT", "t1")
+        assert event['ts'] > 0 and event['payload'] == {'ts': 0, 'payload': "exchange echo"}
+
+def test_query_and_replay_from_the_database():
+    """
+    With the TimescaleDB sink, query and replay read the execution_audit table with the same
+    filters and event shape as the file sink.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = SQLiteStandIn(os.path.join(tmp, "audit.db"))
+        cur = conn.cursor()
+        cur.execute("CREATE TABLE execution_audit (ts DOUBLE PRECISION, kind TEXT, symbol TEXT, trace_id TEXT, payload JSONB)")
+        rows = [(1.0, "input", "A/USDT:USDT", "t1", {'hash': "h1"}),
+                (2.0, "order", "A/USDT:USDT", "t1", {'request': {'signal': "BUY"}}),
+                (3.0, "decision", "A/USDT:USDT", "t1", {'output': "BUY"}),
+                (4.0, "order", "B/USDT:USDT", "t2", {'request': {'signal': "SELL"}})]
+        for ts, kind, symbol, trace_id, payload in rows:
+            cur.execute("INSERT INTO execution_audit VALUES (%s, %s, %s, %s, %s)",
+                        (ts, kind, symbol, trace_id, json.dumps(payload)))
+        conn.commit()
+        orders = query(kind="order", sink="timescaledb", conn=conn)
+        assert [e['symbol'] for e in orders] == ["A/USDT:USDT", "B/USDT:USDT"]
+        assert [e['ts'] for e in query(sink="timescaledb", conn=conn, start=2.0, limit=2)] == [3.0, 4.0]
+        timeline = replay("t1", sink="timescaledb", conn=conn)
+        assert timeline['inputs'][0]['payload'] == {'hash': "h1"}
+        assert timeline['decision']['payload'] == {'output': "BUY"}
+        assert [e['kind'] for e in timeline['events']] == ["input", "order", "decision"]
+        conn.close()
+
+if __name__ == "__main__":
+    test_events_round_trip_and_replay()
+    test_logging_never_blocks_the_caller()
+    test_payloads_are_captured_at_log_time()
+    test_payload_keys_do_not_shadow_columns()
+    test_query_and_replay_from_the_database()
+    print("audit log tests passed")
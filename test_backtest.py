@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+from backtest import BacktestConfig, run_backtest, simulate
+
+def make_candles(closes, spread=0.1):
+    closes = np.asarray(closes, dtype=float)
+    index = pd.date_range('2024-01-01', periods=len(closes), freq='1min', tz='UTC')
+    return pd.DataFrame({
+        'open': closes, 'high': closes + spread, 'low': closes - spread,
+        'close': closes, 'volume': np.full(len(closes), 100.0),
+    }, index=index)
+
+def make_signals(candles, entries):
+    signals = pd.DataFrame({'signal': 0, 'entry': candles['close'], 'stop_loss': np.nan,
+                            'take_profit': np.nan, 'confidence': 0.0}, index=candles.index)
+    for i, side, entry, sl, tp in entries:
+        signals.iloc[i] = [side, entry, sl, tp, 80.0]
+    return signals
+
+def test_limit_fill_and_take_profit():
+    """
+    A long limit fills on the next bar that trades through it and exits at TP net of fees.
+    """
+    candles = make_candles([100, 100, 101, 102, 103, 104])
+    signals = make_signals(candles, [(0, 1, 100.0, 98.0, 102.0)])
+    config = BacktestConfig(slippage_bps=0, max_hold=10)
+    trades = simulate(candles, signals, config)
+    assert len(trades) == 1
+    trade = trades.iloc[0]
+    assert trade['fill_idx'] == 1 and trade['reason'] == 'tp' and trade['exit_idx'] == 3
+    expected = (102.0 - 100.0) / 100.0 - config.maker_fee - config.taker_fee
+    assert abs(trade['return'] - expected) < 1e-12
+
+def test_stop_wins_when_both_trigger():
+    """
+    If SL and TP trigger in the same bar the stop is assumed to fill first.
+    """
+    candles = make_candles([100, 100, 100], spread=5)
+    signals = make_signals(candles, [(0, 1, 100.0, 97.0, 103.0)])
+    trades = simulate(candles, signals, BacktestConfig(slippage_bps=0, max_hold=5))
+    assert trades.iloc[0]['reason'] == 'sl'
+    assert trades.iloc[0]['exit'] == 97.0
+
+def test_one_position_at_a_time():
+    """
+    Signals raised while a position is open are ignored.
+    """
+    candles = make_candles([100] * 4 + [110] * 4)
+    signals = make_signals(candles, [(0, 1, 100.0, 90.0, 105.0), (2, 1, 100.0, 90.0, 105.0)])
+    trades = simulate(candles, signals, BacktestConfig(max_hold=10))
+    assert list(trades['signal_idx']) == [0]
+
+def test_run_backtest_smoke():
+    """
+    The full pipeline runs on synthetic history and reports stats.
+    """
+    rng = np.random.default_rng(7)
+    candles = make_candles(100 * np.exp(np.cumsum(rng.normal(0, 0.002, 3000))), spread=0.05)
+    trades, stats = run_backtest(candles)
+    assert stats['trades'] == len(trades)
+    assert 'max_drawdown' in stats
+
+if __name__ == "__main__":
+    test_limit_fill_and_take_profit()
+    test_stop_wins_when_both_trigger()
+    test_one_position_at_a_time()
+    test_run_backtest_smoke()
+    print("backtest tests passed")
@@ -0,0 +1,32 @@
+from candle_clock import next_candle_close, closed_timeframes, drop_unclosed
+
+def test_next_candle_close():
+    """
+    Boundaries are UTC-aligned multiples of the timeframe, strictly after now.
+    """
+    assert next_candle_close("1m", now=1_700_000_010.5) == 1_700_000_040
+    assert next_candle_close("1m", now=1_700_000_040) == 1_700_000_100
+    assert next_candle_close("15m", now=1_700_000_010) % 900 == 0
+
+def test_closed_timeframes():
+    """
+    5m and 15m only refresh on their own candle closes.
+    """
+    timeframes = ["1m", "5m", "15m"]
+    assert closed_timeframes(60, timeframes) == ["1m"]
+    assert closed_timeframes(300, timeframes) == ["1m", "5m"]
+    assert closed_timeframes(900, timeframes) == ["1m", "5m", "15m"]
+
+def test_drop_unclosed():
+    """
+    The still-forming candle returned by the exchange is removed.
+    """
+    ohlcv = [[t * 1000, 1, 1, 1, 1, 1] for t in (0, 60, 120)]
+    assert len(drop_unclosed(ohlcv, "1m", now=180.5)) == 3
+    assert len(drop_unclosed(ohlcv, "1m", now=179)) == 2
+
+if __name__ == "__main__":
+    test_next_candle_close()
+    test_closed_timeframes()
+    test_drop_unclosed()
+    print("candle_clock tests passed")
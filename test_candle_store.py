@@ -0,0 +1,97 @@
+import math
+import multiprocessing
+import os
+import tempfile
+import numpy as np
+from candle_store import CandleStore, RECORD_DTYPE, CANDLE_FIELDS, INDICATOR_FIELDS, decode_record
+from testing_utils import synthetic_ohlcv
+from trade_utils import compute_indicators
+
+def stamped(ts):
+    """Record whose every float equals its timestamp, so a torn read is easy to spot."""
+    record = np.zeros((), dtype=RECORD_DTYPE)
+    record['ts'] = ts
+    for name in CANDLE_FIELDS + INDICATOR_FIELDS:
+        record[name] = float(ts)
+    return record
+
+def hammer(path, writes):
+    store = CandleStore(path, capacity=8, create=True)
+    for ts in range(1, writes + 1):
+        store.append(stamped(ts))
+        if ts % 3 == 0:
+            store.append(stamped(ts))  # Same-candle rewrite, like the DB upsert
+    store.close()
+
+def test_roundtrip_matches_indicator_document():
+    """
+    A record decodes back to the compute_indicators document the ETL stores in TimescaleDB.
+    """
+    ohlcv = synthetic_ohlcv()
+    indicators = compute_indicators(ohlcv)
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = CandleStore.for_series("CORE/USDT:USDT", "1m", create=True, directory=tmp)
+        writer.write(ohlcv[-1], indicators)
+        reader = CandleStore.for_series("CORE/USDT:USDT", "1m", directory=tmp)
+        latest = reader.latest()
+        for key, value in indicators.items():
+            if key in latest:
+                if isinstance(value, float) and math.isnan(value):
+                    assert math.isnan(latest[key])
+                else:
+                    assert latest[key] == value, key
+        assert set(latest) >= set(indicators) - {'volume'}
+        assert reader.read(1)[0]['close'] == ohlcv[-1][4]
+        reader.close()
+        writer.close()
+
+def test_ring_wraps_and_views_are_zero_copy():
+    """
+    Older records are overwritten once the ring is full; views share the mapping and
+    verify() detects a slot rewritten after the view was taken.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "s.ring")
+        writer = CandleStore(path, capacity=4, create=True)
+        for ts in range(1, 7):
+            writer.append(stamped(ts))
+        writer.append(stamped(3))  # Out-of-order write is ignored
+        reader = CandleStore(path)
+        assert len(reader) == 4
+        assert list(reader.read(10)['ts']) == [3, 4, 5, 6]
+        records, token = reader.view(2)
+        assert list(records['ts']) == [5, 6]
+        assert np.shares_memory(records, reader.ring)
+        assert reader.verify(token)
+        writer.append(stamped(6))
+        assert not reader.verify(token)
+        assert decode_record(reader.read(1)[0])['timestamp'] == 6
+        reader.close()
+        writer.close()
+
+def test_concurrent_reader_never_sees_torn_records():
+    """
+    A reader process polling while another process writes only ever gets whole, ordered records.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "s.ring")
+        CandleStore(path, capacity=8, create=True).close()
+        writer = multiprocessing.get_context("spawn").Process(target=hammer, args=(path, 20000))
+        reader = CandleStore(path)
+        writer.start()
+        reads = 0
+        while writer.is_alive() or reads == 0:
+            records = reader.read(4)
+            for name in CANDLE_FIELDS + INDICATOR_FIELDS:
+                assert (records[name] == records['ts']).all()
+            assert (np.diff(records['ts']) == 1).all()
+            reads += 1
+        writer.join()
+        assert reader.read(1)[0]['ts'] == 20000
+        reader.close()
+
+if __name__ == "__main__":
+    test_roundtrip_matches_indicator_document()
+    test_ring_wraps_and_views_are_zero_copy()
+    test_concurrent_reader_never_sees_torn_records()
+    print("candle store tests passed")
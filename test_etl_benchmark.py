@@ -0,0 +1,40 @@
+import os
+import sqlite3
+import tempfile
+import tracing
+from etl_benchmark import STAGES, benchmark, format_report, sqlite_pool
+from sim_exchange import SimExchange
+
+def test_benchmark_drives_run_etl_end_to_end():
+    """
+    Every symbol's tick goes through fetch, compute, encode, upsert and notify against the
+    stand-ins, and the report breaks the time down per stage.
+    """
+    symbols = [f"B{i}/USDT:USDT" for i in range(3)]
+    sim = SimExchange(symbols, history=150)
+    original = tracing.TRACE_FILE
+    tracing.TRACE_FILE = ""
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            pool = sqlite_pool(path)
+            try:
+                result = benchmark(sim, symbols, pool, ticks=2, workers=2, timeframes=["1m"])
+            finally:
+                pool.close()
+            rows = sqlite3.connect(path).execute(
+                "SELECT symbol, COUNT(*) FROM market_indicators GROUP BY symbol").fetchall()
+    finally:
+        tracing.TRACE_FILE = original
+    assert result['failed_ticks'] == 0
+    assert result['tick']['count'] == 6
+    assert result['symbols_per_second'] > 0
+    assert dict(rows) == {symbol: 2 for symbol in symbols}  # One closed candle per tick, upserted
+    for stage in STAGES:
+        assert result['stages'][stage]['count'] == (2 * 3)
+    assert abs(sum(s['share'] for s in result['stages'].values()) - 1) < 1e-9
+    assert "symbols/s" in format_report(result)
+
+if __name__ == "__main__":
+    test_benchmark_drives_run_etl_end_to_end()
+    print("etl benchmark tests passed")
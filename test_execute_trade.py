@@ -1,24 +1,31 @@
 import os
 import ccxt
 from dotenv import load_dotenv
+from execution_context import ExecutionContext
 
 load_dotenv()
 
 SYMBOL = 'CORE/USDT:USDT'
 ORDER_SIZE_USD = 10  # Use a small test size
 
+_context = None
+
+def get_context():
+    # Markets are loaded once per run, not once per order
+    global _context
+    if _context is None:
+        _context = ExecutionContext(ccxt.bybit({
+            'enableRateLimit': True,
+            'options': {'defaultType': 'linear'},
+            'apiKey': os.getenv('BYBIT_API_KEY'),
+            'secret': os.getenv('BYBIT_API_SECRET'),
+        }), [SYMBOL])
+    return _context
+
 def get_amount(symbol, usd_size):
-    exchange = ccxt.bybit({
-        'enableRateLimit': True,
-        'options': {'defaultType': 'linear'},
-        'apiKey': os.getenv('BYBIT_API_KEY'),
-        'secret': os.getenv('BYBIT_API_SECRET'),
-    })
-    exchange.load_markets()
-    price = exchange.fetch_ticker(symbol)['last']
-    market = exchange.market(symbol)
-    amount_precision = int(market['precision']['amount'])
-    amount = round(usd_size / price, amount_precision)
+    context = get_context()
+    price = context.exchange.fetch_ticker(symbol)['last']
+    amount = context.amount_for_notional(symbol, usd_size, price)
     return amount, price
 
 def test_execute_trade_logic(signal: str, entry_price: float, stop_loss: float, take_profit: float, symbol: str = "CORE/USDT:USDT", amount: float = None) -> str:
@@ -0,0 +1,78 @@
+import ccxt
+from execution_context import ExecutionContext, OrderValidationError
+
+SYMBOL = 'CORE/USDT:USDT'
+
+class FakeMarketsExchange:
+    """Serves one Bybit-style market (TICK_SIZE precision) and counts load_markets calls."""
+
+    precisionMode = ccxt.TICK_SIZE
+
+    def __init__(self, tick=0.0001, lot=0.1):
+        self.tick = tick
+        self.lot = lot
+        self.loads = 0
+        self.leverage = {}
+
+    def load_markets(self):
+        self.loads += 1
+
+    def market(self, symbol):
+        return {
+            'symbol': symbol,
+            'precision': {'price': self.tick, 'amount': self.lot},
+            'limits': {'amount': {'min': self.lot, 'max': 100000}, 'cost': {'min': 5}, 'leverage': {'max': 50}},
+        }
+
+    def set_leverage(self, leverage, symbol):
+        self.leverage[symbol] = leverage
+
+def test_normalization():
+    """
+    Prices round to the tick, amounts round down to the lot; markets load once.
+    """
+    fake = FakeMarketsExchange()
+    context = ExecutionContext(fake, [SYMBOL], leverage=5)
+    assert context.normalize_price(SYMBOL, 0.812345678) == 0.8123
+    assert context.normalize_amount(SYMBOL, 12.39) == 12.3
+    assert context.amount_for_notional(SYMBOL, 10, 0.8) == 12.5
+    order = context.prepare_order(SYMBOL, 'BUY', 12.39, 0.81236, 0.79001, 0.84449)
+    assert (order.amount, order.entry_price, order.stop_loss, order.take_profit) == (12.3, 0.8124, 0.79, 0.8445)
+    assert fake.loads == 1 and fake.leverage[SYMBOL] == 5
+
+def test_non_power_of_ten_steps():
+    """
+    Ticks like 0.25 or 0.0025 and lots like 0.025 keep enough decimals to stay on their grid.
+    """
+    context = ExecutionContext(FakeMarketsExchange(tick=0.25, lot=0.025), [SYMBOL])
+    assert context.rules(SYMBOL).price_decimals == 2
+    assert context.normalize_price(SYMBOL, 101.75) == 101.75
+    assert context.normalize_price(SYMBOL, 101.8) == 101.75
+    assert context.normalize_amount(SYMBOL, 1.2374) == 1.225
+    fine = ExecutionContext(FakeMarketsExchange(tick=0.0025), [SYMBOL])
+    assert fine.normalize_price(SYMBOL, 0.81374) == 0.8125
+    assert fine.normalize_price(SYMBOL, 0.8139) == 0.815
+
+def test_validation_rejects():
+    """
+    Orders the exchange would reject fail locally with OrderValidationError.
+    """
+    context = ExecutionContext(FakeMarketsExchange(), [SYMBOL])
+    bad_orders = [
+        ('BUY', 0.05, 1.0, 0.9, 1.1),    # below min amount
+        ('BUY', 1.0, 1.0, 0.9, 1.1),     # below min notional
+        ('BUY', 10.0, 1.0, 1.1, 1.2),    # stop loss above entry
+        ('SELL', 10.0, 1.0, 0.9, 0.8),   # stop loss below entry on a short
+    ]
+    for signal, amount, entry, sl, tp in bad_orders:
+        try:
+            context.prepare_order(SYMBOL, signal, amount, entry, sl, tp)
+        except OrderValidationError:
+            continue
+        raise AssertionError(f"Expected rejection for {signal} {amount} {entry} {sl} {tp}")
+
+if __name__ == "__main__":
+    test_normalization()
+    test_non_power_of_ten_steps()
+    test_validation_rejects()
+    print("execution context tests passed")
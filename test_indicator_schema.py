@@ -0,0 +1,47 @@
+import json
+import numpy as np
+from testing_utils import synthetic_ohlcv
+from trade_utils import compute_indicators
+from indicator_schema import (COMPACT_FIELDS, SCHEMA_VERSION, compact_indicators, compact_table,
+                              expand_row, price_decimals)
+
+def test_projection_keeps_decision_fields_and_shrinks_payload():
+    """
+    The compact payload keeps every field the decision logic reads, quantized, and is far smaller.
+    """
+    raw = compute_indicators(synthetic_ohlcv())
+    compact = compact_indicators(raw, "1m")
+    assert compact['v'] == SCHEMA_VERSION and compact['tf'] == "1m"
+    assert compact['t'] == raw['timestamp']
+    # Prices keep 6 significant digits of a ~0.5 close
+    assert price_decimals(raw['last_close']) == 6
+    assert abs(compact['c'] - raw['last_close']) <= 5e-7
+    assert abs(compact['bu'] - raw['bb_upper']) <= 5e-7
+    assert compact['r'] == round(raw['rsi'], 1)
+    assert compact['esl'] == np.sign(raw['ema_slope'])
+    assert compact['osl'] in (-1, 0, 1)
+    assert compact['x'] == {'bullish': 1, 'bearish': -1}.get(raw['ema_cross'], 0)
+    assert abs(compact['vd'] - (raw['last_close'] - raw['vwap']) / raw['vwap'] * 100) < 1e-3
+    assert 'obv' not in compact and 'volume_avg_20' not in compact
+    assert len(json.dumps(compact)) < 0.5 * len(json.dumps(raw))
+
+def test_merged_table_and_missing_values():
+    """
+    The merged table sends the column list once; NaN or absent fields encode as null.
+    """
+    raw = compute_indicators(synthetic_ohlcv())
+    gappy = dict(raw, adx=float('nan'), candle_pattern=None)
+    table = compact_table({"1m": raw, "5m": gappy}, "CORE/USDT:USDT")
+    assert table['cols'] == [key for key, _, _ in COMPACT_FIELDS]
+    assert set(table['rows']) == {"1m", "5m"}
+    row = expand_row(table['rows']["5m"])
+    assert row['adx'] is None and row['cp'] is None
+    assert expand_row(table['rows']["1m"])['adx'] == round(raw['adx'], 1)
+    separate = sum(len(json.dumps(compact_indicators(r, tf))) for tf, r in (("1m", raw), ("5m", gappy)))
+    assert len(json.dumps(table)) < separate
+    json.dumps(table, allow_nan=False)
+
+if __name__ == "__main__":
+    test_projection_keeps_decision_fields_and_shrinks_payload()
+    test_merged_table_and_missing_values()
+    print("indicator schema tests passed")
@@ -0,0 +1,112 @@
+import asyncio
+import time
+from orchestrator import DecisionOrchestrator, mark_placing_orders
+
+def event(symbol, timestamp, timeframes=("1m",), change=0.0):
+    return {"symbol": symbol, "timestamp": timestamp, "timeframes": list(timeframes), "change": change}
+
+class FakeDecider:
+    """Stands in for the agent run: records concurrency and can be held open until released."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.started = []
+        self.finished = []
+
+    async def __call__(self, symbol, ev):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        self.started.append((symbol, ev["timestamp"]))
+        try:
+            await asyncio.sleep(self.delay)
+            self.finished.append((symbol, ev["timestamp"]))
+        finally:
+            self.active -= 1
+
+def test_bounded_concurrency_and_position_gating():
+    """
+    Twenty symbols decide concurrently but never more than max_concurrent at once;
+    symbols already in a position are skipped.
+    """
+    async def scenario():
+        decider = FakeDecider()
+        orchestrator = DecisionOrchestrator(decider, lambda s: s == "S3", max_concurrent=4)
+        dispatcher = orchestrator.start()
+        for i in range(20):
+            orchestrator.submit(event(f"S{i}", 1000))
+        await asyncio.wait_for(orchestrator.drain(), 5)
+        await orchestrator.stop()
+        assert dispatcher.done()
+        return decider, orchestrator
+
+    decider, orchestrator = asyncio.run(scenario())
+    assert decider.peak == 4
+    assert len(decider.finished) == 19
+    assert ("S3", 1000) not in decider.started
+    assert orchestrator.stats['skipped_in_position'] == 1
+
+def test_priority_and_stale_cancellation():
+    """
+    Symbols whose indicators moved most are dispatched first; a newer candle cancels the
+    running cycle and only the newest candle's decision completes.
+    """
+    async def scenario():
+        decider = FakeDecider(delay=0.1)
+        orchestrator = DecisionOrchestrator(decider, lambda s: False, max_concurrent=1)
+        orchestrator.submit(event("QUIET", 1000, change=0.1))
+        orchestrator.submit(event("MOVER", 1000, change=2.5))
+        orchestrator.submit(event("HTF", 1000, timeframes=("1m", "5m", "15m")))
+        orchestrator.start()
+        await asyncio.sleep(0.02)
+        orchestrator.submit(event("HTF", 2000, timeframes=("1m",)))  # HTF is running; newer candle arrives
+        orchestrator.submit(event("HTF", 1000))  # Out-of-order duplicate is ignored
+        await asyncio.wait_for(orchestrator.drain(), 5)
+        await orchestrator.stop()
+        return decider, orchestrator
+
+    decider, orchestrator = asyncio.run(scenario())
+    assert [s for s, _ in decider.started[:3]] == ["HTF", "MOVER", "QUIET"]
+    assert ("HTF", 1000) not in decider.finished
+    assert ("HTF", 2000) in decider.finished
+    assert orchestrator.stats['cancelled_stale'] == 1
+
+def test_cycle_placing_orders_is_not_cancelled():
+    """
+    Once the order tool has started (in a worker thread, like the agents SDK runs sync tools),
+    a newer candle no longer cancels the cycle; it waits for it and is then gated on the order.
+    """
+    resting = set()
+
+    def place_order(symbol):
+        mark_placing_orders()
+        time.sleep(0.1)  # Exchange round trip
+        resting.add(symbol)
+
+    async def decide(symbol, ev):
+        started.append(ev["timestamp"])
+        await asyncio.to_thread(place_order, symbol)
+        finished.append(ev["timestamp"])
+
+    async def scenario():
+        orchestrator = DecisionOrchestrator(decide, lambda s: s in resting, max_concurrent=2)
+        orchestrator.start()
+        orchestrator.submit(event("CORE", 1000))
+        await asyncio.sleep(0.03)
+        orchestrator.submit(event("CORE", 2000))
+        await asyncio.wait_for(orchestrator.drain(), 5)
+        await orchestrator.stop()
+        return orchestrator
+
+    started, finished = [], []
+    orchestrator = asyncio.run(scenario())
+    assert started == [1000] and finished == [1000]
+    assert orchestrator.stats['kept_placing_orders'] == 1 and orchestrator.stats['cancelled_stale'] == 0
+    assert orchestrator.stats['skipped_in_position'] == 1
+
+if __name__ == "__main__":
+    test_bounded_concurrency_and_position_gating()
+    test_priority_and_stale_cancellation()
+    test_cycle_placing_orders_is_not_cancelled()
+    print("orchestrator tests passed")
@@ -0,0 +1,120 @@
+from order_execution import ROLLBACK_CANCEL_ATTEMPTS, place_protected_entry
+
+SYMBOL = 'CORE/USDT:USDT'
+
+class FakeOrderExchange:
+    """
+    Records create/cancel calls; order types listed in `reject` raise like an exchange error.
+    fetch_order reports `filled` per order id, and `status` for orders that were not cancelled.
+    """
+
+    def __init__(self, attach_supported=False, reject=(), cancel_fails=False, filled=None, status='open'):
+        self.has = {'createOrderWithTakeProfitAndStopLoss': attach_supported}
+        self.reject = set(reject)
+        self.cancel_fails = cancel_fails
+        self.filled = filled or {}
+        self.status = status
+        self.created = []
+        self.cancelled = []
+        self.cancel_calls = []
+
+    def create_order(self, symbol, type, side, amount, price=None, params=None):
+        if type in self.reject:
+            raise Exception(f"{type} rejected")
+        self.created.append((type, side, amount, price, params or {}))
+        return {'id': str(len(self.created))}
+
+    def cancel_order(self, order_id, symbol):
+        self.cancel_calls.append(order_id)
+        if self.cancel_fails:
+            raise Exception("request timed out")
+        self.cancelled.append(order_id)
+
+    def fetch_order(self, order_id, symbol, params=None):
+        if not (params or {}).get('acknowledged'):
+            # Like Bybit on a unified account
+            raise Exception("fetchOrder() requires params['acknowledged'] = True")
+        status = 'canceled' if order_id in self.cancelled else self.status
+        return {'id': order_id, 'status': status, 'filled': self.filled.get(order_id, 0.0)}
+
+def test_attached_tpsl_single_request():
+    """
+    With venue support, TP/SL ride on the entry and only one request is sent.
+    """
+    fake = FakeOrderExchange(attach_supported=True)
+    result = place_protected_entry(fake, SYMBOL, 'BUY', 10, 1.0, 0.97, 1.03)
+    assert result.ok and result.mode == "attached"
+    assert len(fake.created) == 1
+    params = fake.created[0][4]
+    assert params['takeProfit']['triggerPrice'] == 1.03
+    assert params['stopLoss']['triggerPrice'] == 0.97
+    # Exchange responses are kept for the audit log but not sent back to the model
+    assert result.legs[0].raw == {'id': '1'}
+    assert 'raw' not in result.to_dict()['legs'][0]
+    assert result.to_dict(include_raw=True)['legs'][0]['raw'] == {'id': '1'}
+
+def test_separate_legs_placed():
+    """
+    Without attachment support, both protective legs are placed on the opposite side.
+    """
+    fake = FakeOrderExchange()
+    result = place_protected_entry(fake, SYMBOL, 'SELL', 10, 1.0, 1.03, 0.97)
+    assert result.ok and result.mode == "separate"
+    assert [leg.name for leg in result.legs] == ["entry", "take_profit", "stop_loss"]
+    assert all(side == 'buy' for _, side, _, _, _ in fake.created[1:])
+    assert result.protection_latency_ms is not None
+
+def test_failed_leg_rolls_back():
+    """
+    A rejected stop loss cancels the placed take profit and the entry.
+    """
+    fake = FakeOrderExchange(reject={'STOP_MARKET'})
+    result = place_protected_entry(fake, SYMBOL, 'BUY', 10, 1.0, 0.97, 1.03)
+    assert not result.ok
+    assert "stop_loss" in result.error
+    assert sorted(fake.cancelled) == ['1', '2']
+    assert result.legs[0].status == "cancelled"
+    assert result.legs[-1].name == "stop_loss"  # Nothing filled, nothing to flatten
+
+def test_filled_entry_is_flattened():
+    """
+    If the entry filled and can no longer be cancelled, the filled amount is closed with a
+    reduce-only market order.
+    """
+    fake = FakeOrderExchange(reject={'TAKE_PROFIT_MARKET'}, cancel_fails=True, filled={'1': 10.0}, status='closed')
+    result = place_protected_entry(fake, SYMBOL, 'BUY', 10, 1.0, 0.97, 1.03)
+    assert result.legs[-1].name == "flatten"
+    assert fake.created[-1] == ("market", "sell", 10.0, None, {"reduceOnly": True})
+    assert fake.cancel_calls.count('1') == 1  # Closed on the exchange: no point retrying
+
+def test_partial_fill_flattens_only_the_filled_amount():
+    """
+    An entry that partially filled before the cancel went through is closed for the filled quantity only.
+    """
+    fake = FakeOrderExchange(reject={'STOP_MARKET'}, filled={'1': 4.0})
+    result = place_protected_entry(fake, SYMBOL, 'SELL', 10, 1.0, 1.03, 0.97)
+    assert result.legs[0].status == "cancelled"
+    assert fake.created[-1] == ("market", "buy", 4.0, None, {"reduceOnly": True})
+
+def test_failed_cancel_without_fill_does_not_flatten():
+    """
+    A cancel that keeps failing on an open, unfilled entry is retried and never turns into a
+    market order against a position the entry did not open.
+    """
+    fake = FakeOrderExchange(reject={'STOP_MARKET'}, cancel_fails=True)
+    result = place_protected_entry(fake, SYMBOL, 'BUY', 10, 1.0, 0.97, 1.03)
+    assert fake.cancel_calls.count('1') == ROLLBACK_CANCEL_ATTEMPTS
+    assert [created[0] for created in fake.created] == ["limit", "TAKE_PROFIT_MARKET"]
+    assert all(leg.name != "flatten" for leg in result.legs)
+    # The entry is still resting without protection; the result must say so
+    assert result.legs[0].status == "placed"
+    assert "still open without TP/SL" in result.error
+
+if __name__ == "__main__":
+    test_attached_tpsl_single_request()
+    test_separate_legs_placed()
+    test_failed_leg_rolls_back()
+    test_filled_entry_is_flattened()
+    test_partial_fill_flattens_only_the_filled_amount()
+    test_failed_cancel_without_fill_does_not_flatten()
+    print("order execution tests passed")
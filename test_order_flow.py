@@ -0,0 +1,96 @@
+import numpy as np
+from order_flow import DAY_MS, FEATURE_FIELDS, OrderBookState, OrderFlowCollector, TradeFlow, order_flow_features, set_collector
+
+SYMBOL = 'CORE/USDT:USDT'
+
+def test_book_features_update_in_place():
+    """
+    Imbalance, microprice and spread come from the preallocated level array, which is reused across updates.
+    """
+    book = OrderBookState(depth=3, imbalance_levels=2)
+    levels = book.levels
+    book.update([[100.0, 3.0], [99.9, 1.0], [99.8, 50.0]], [[100.2, 1.0], [100.3, 1.0]], 1000)
+    features = book.features()
+    assert book.levels is levels
+    assert abs(features['book_imbalance'] - (4 - 2) / 6) < 1e-12
+    assert abs(features['microprice'] - (100.2 * 3 + 100.0 * 1) / 4) < 1e-12
+    assert abs(features['spread_bps'] - 0.2 / 100.1 * 1e4) < 1e-9
+    book.update([[100.1, 1.0]], [], 2000)
+    assert book.features()['microprice'] is None
+
+def test_trade_flow_matches_brute_force():
+    """
+    Incremental session VWAP, session delta and rolling-window delta equal a recomputation
+    from the raw trades, including expiry and the UTC session reset.
+    """
+    rng = np.random.default_rng(7)
+    start = 5 * DAY_MS - 30 * 60_000  # Half an hour before a session boundary
+    ts = np.sort(start + rng.integers(0, 60 * 60_000, 5000))
+    price = 100 + np.cumsum(rng.normal(0, 0.01, len(ts)))
+    signed = rng.uniform(0.1, 2, len(ts)) * rng.choice([-1, 1], len(ts))
+    flow = TradeFlow(window_ms=60_000, capacity=1024)
+    for batch in np.array_split(np.arange(len(ts)), 97):
+        flow.add(ts[batch], price[batch], signed[batch])
+        now = ts[batch[-1]]
+        in_window = (ts > now - 60_000) & (ts <= now)
+        session = (ts // DAY_MS == now // DAY_MS) & (ts <= now)
+        features = flow.features()
+        assert abs(features['volume_delta_window'] - signed[in_window].sum()) < 1e-6
+        assert abs(features['volume_delta'] - signed[session].sum()) < 1e-6
+        volume = np.abs(signed[session])
+        assert abs(features['session_vwap'] - (price[session] @ volume) / volume.sum()) < 1e-9
+        buys = signed[in_window][signed[in_window] > 0].sum()
+        assert abs(features['buy_ratio_window'] - buys / np.abs(signed[in_window]).sum()) < 1e-9
+
+def test_burst_larger_than_the_ring_keeps_session_totals():
+    """
+    A burst bigger than the ring still counts fully in the session VWAP and delta; the trades the
+    window features lose are counted instead of silently vanishing.
+    """
+    rng = np.random.default_rng(11)
+    ts = 10 * DAY_MS + np.arange(300, dtype=np.int64)
+    price = 100 + rng.normal(0, 0.1, len(ts))
+    signed = rng.uniform(0.1, 2, len(ts)) * rng.choice([-1, 1], len(ts))
+    flow = TradeFlow(window_ms=60_000, capacity=128)
+    flow.add(ts[:100], price[:100], signed[:100])
+    flow.add(ts[100:], price[100:], signed[100:])
+    features = flow.features()
+    assert abs(features['volume_delta'] - signed.sum()) < 1e-9
+    volume = np.abs(signed)
+    assert abs(features['session_vwap'] - (price @ volume) / volume.sum()) < 1e-9
+    assert abs(features['volume_delta_window'] - signed[-128:].sum()) < 1e-9
+    assert flow.window_dropped == 300 - 128
+
+def test_collector_features_and_snapshot_hook():
+    """
+    Feeds arrive as ccxt structures; a stale book or trade feed reports its fields as missing, and
+    the ETL hook sees the active collector.
+    """
+    collector = OrderFlowCollector(exchange=None, symbols=[SYMBOL], depth=5)
+    collector.apply_book(SYMBOL, {'bids': [[1.0, 10.0]], 'asks': [[1.01, 10.0]], 'timestamp': 1_000_000})
+    collector.apply_trades(SYMBOL, [
+        {'timestamp': 1_000_100, 'price': 1.0, 'amount': 4.0, 'side': 'buy'},
+        {'timestamp': 1_000_200, 'price': 1.01, 'amount': 1.0, 'side': 'sell'},
+    ])
+    features = collector.features(SYMBOL, now_ms=1_001_000)
+    assert list(features) == FEATURE_FIELDS
+    assert features['book_imbalance'] == 0.0 and features['volume_delta'] == 3.0
+    assert abs(features['session_vwap'] - 5.01 / 5) < 1e-12
+    stale = collector.features(SYMBOL, now_ms=1_000_000 + 120_000)
+    assert all(stale[field] is None for field in FEATURE_FIELDS)
+    collector.apply_trades(SYMBOL, [{'timestamp': 1_115_000, 'price': 1.0, 'amount': 2.0, 'side': 'sell'}])
+    alive = collector.features(SYMBOL, now_ms=1_000_000 + 120_000)
+    assert alive['microprice'] is None and alive['volume_delta_window'] == -2.0 and alive['volume_delta'] == 1.0
+    assert order_flow_features(SYMBOL) == {}
+    set_collector(collector)
+    try:
+        assert set(order_flow_features(SYMBOL)) == set(FEATURE_FIELDS)
+    finally:
+        set_collector(None)
+
+if __name__ == "__main__":
+    test_book_features_update_in_place()
+    test_trade_flow_matches_brute_force()
+    test_burst_larger_than_the_ring_keeps_session_totals()
+    test_collector_features_and_snapshot_hook()
+    print("order flow tests passed")
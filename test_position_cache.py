@@ -0,0 +1,76 @@
+import asyncio
+from position_cache import PositionCache
+
+SYMBOL = 'CORE/USDT:USDT'
+
+class FakeAccountStream:
+    """Local stand-in for a ccxt.pro client: REST snapshots plus queued stream updates."""
+
+    def __init__(self, rest_positions=None):
+        self.rest_positions = rest_positions or []
+        self.position_updates = asyncio.Queue()
+        self.order_updates = asyncio.Queue()
+        self.closed = False
+
+    async def fetch_positions(self, symbols):
+        return list(self.rest_positions)
+
+    async def fetch_open_orders(self, symbol):
+        return []
+
+    async def watch_positions(self, symbols):
+        return await self.position_updates.get()
+
+    async def watch_orders(self):
+        return await self.order_updates.get()
+
+    async def close(self):
+        self.closed = True
+
+async def settle():
+    # Let the cache's watch tasks consume queued updates
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_stream_updates_position():
+    """
+    Reconciliation seeds a flat book; stream events then flip the cached state without REST calls.
+    """
+    async def scenario():
+        fake = FakeAccountStream()
+        cache = PositionCache(fake, [SYMBOL], reconcile_interval=3600)
+        await cache.start()
+        assert cache.in_position(SYMBOL) is False
+        assert cache.staleness(SYMBOL) < 1
+
+        await fake.position_updates.put([{'symbol': SYMBOL, 'contracts': 5.0, 'side': 'long', 'entryPrice': 1.2}])
+        await settle()
+        assert cache.in_position(SYMBOL) is True
+        assert cache.get(SYMBOL).source == "stream"
+
+        await fake.order_updates.put([{'id': '1', 'symbol': SYMBOL, 'status': 'open'}])
+        await settle()
+        assert len(cache.open_orders(SYMBOL)) == 1
+
+        await fake.position_updates.put([{'symbol': SYMBOL, 'contracts': 0}])
+        await settle()
+        assert cache.in_position(SYMBOL) is False
+        await cache.stop()
+        assert fake.closed
+
+    asyncio.run(scenario())
+
+def test_stale_state_fails_safe():
+    """
+    State that has not been confirmed within max_staleness counts as in position.
+    """
+    cache = PositionCache(FakeAccountStream(), [SYMBOL], max_staleness=10)
+    assert cache.in_position(SYMBOL) is True
+    cache.apply_positions([], source="rest", full_snapshot=True, now=1000.0)
+    assert cache.staleness(SYMBOL, now=1005.0) == 5.0
+    assert cache.staleness(SYMBOL, now=1100.0) > cache.max_staleness
+
+if __name__ == "__main__":
+    test_stream_updates_position()
+    test_stale_state_fails_safe()
+    print("position cache tests passed")
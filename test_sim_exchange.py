@@ -0,0 +1,97 @@
+import ccxt
+from concurrent.futures import ThreadPoolExecutor
+from execution_context import ExecutionContext
+from loadtest import run_loadtest
+from order_execution import place_protected_entry
+from sim_exchange import SimExchange
+from trade_utils import compute_indicators, fetch_ohlcv
+
+SYMBOL = 'SIM0/USDT:USDT'
+
+def test_fetch_ohlcv_timeframes():
+    """
+    Higher timeframes aggregate 1m bars on their boundaries and feed compute_indicators.
+    """
+    sim = SimExchange([SYMBOL], history=2000)
+    for tf, ms in (('1m', 60_000), ('5m', 300_000), ('15m', 900_000)):
+        ohlcv = fetch_ohlcv(SYMBOL, tf, 100, exchange=sim)
+        assert len(ohlcv) == 100
+        assert all(bar[0] % ms == 0 for bar in ohlcv)
+        assert ohlcv[1][0] - ohlcv[0][0] == ms
+    assert 'rsi' in compute_indicators(fetch_ohlcv(SYMBOL, '1m', 100, exchange=sim))
+
+def test_limit_entry_with_attached_tpsl():
+    """
+    A filled entry opens a position; its attached stop or target later closes it.
+    """
+    sim = SimExchange([SYMBOL], volatility=0.01, seed=3)
+    price = sim.last_price(SYMBOL)
+    result = place_protected_entry(sim, SYMBOL, 'BUY', 100, price * 1.05, price * 0.9, price * 1.1)
+    assert result.ok and result.mode == 'attached'
+    sim.step()
+    assert sim.fetch_positions([SYMBOL])[0]['contracts'] == 100
+    assert len(sim.fetch_open_orders(SYMBOL)) == 2
+    for _ in range(2000):
+        sim.step()
+        if sim.fetch_positions([SYMBOL])[0]['contracts'] == 0:
+            break
+    assert sim.fetch_positions([SYMBOL])[0]['contracts'] == 0
+    assert sim.fetch_open_orders(SYMBOL) == []
+
+def test_separate_legs_and_rollback():
+    """
+    Trigger orders work without attachment; a cancelled unfilled entry leaves no exposure.
+    """
+    sim = SimExchange([SYMBOL], attach_tpsl=False)
+    price = sim.last_price(SYMBOL)
+    result = place_protected_entry(sim, SYMBOL, 'SELL', 10, price * 1.5, price * 1.6, price * 1.4)
+    assert result.ok and [leg.name for leg in result.legs] == ['entry', 'take_profit', 'stop_loss']
+    sim.cancel_order(result.legs[0].order_id, SYMBOL)
+    sim.step()
+    assert sim.fetch_positions([SYMBOL])[0]['contracts'] == 0
+
+def test_rate_limit_and_injected_errors():
+    """
+    Throttling and injected faults surface as ccxt exceptions.
+    """
+    sim = SimExchange([SYMBOL], rate_limit=2)
+    sim.fetch_ticker(SYMBOL)
+    sim.fetch_ticker(SYMBOL)
+    try:
+        sim.fetch_ticker(SYMBOL)
+        raise AssertionError("expected RateLimitExceeded")
+    except ccxt.RateLimitExceeded:
+        pass
+    faulty = SimExchange([SYMBOL], error_rate={'create_order': 1.0})
+    try:
+        faulty.create_order(SYMBOL, 'limit', 'buy', 1, 1.0)
+        raise AssertionError("expected NetworkError")
+    except ccxt.NetworkError:
+        pass
+    assert ExecutionContext(faulty, [SYMBOL]).rules(SYMBOL).tick_size == 0.0001
+
+def test_call_counts_under_threads():
+    """
+    Calls from a thread pool are all counted.
+    """
+    sim = SimExchange([SYMBOL], history=20)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: sim.fetch_ticker(SYMBOL), range(4000)))
+    assert sim.call_counts()['fetch_ticker'] == 4000
+
+def test_loadtest_runs():
+    """
+    The offline loop completes across several symbols.
+    """
+    summary, timer = run_loadtest(symbols=4, cycles=2, workers=4)
+    assert sum(summary['outcomes'].values()) == 8
+    assert 'exchange_fetch' in timer.samples
+
+if __name__ == "__main__":
+    test_fetch_ohlcv_timeframes()
+    test_limit_entry_with_attached_tpsl()
+    test_separate_legs_and_rollback()
+    test_rate_limit_and_injected_errors()
+    test_call_counts_under_threads()
+    test_loadtest_runs()
+    print("sim exchange tests passed")
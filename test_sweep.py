@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import sweep
+
+def make_candles(n=3000, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    index = pd.date_range('2024-01-01', periods=n, freq='1min', tz='UTC')
+    return pd.DataFrame({'open': close, 'high': close * 1.001, 'low': close * 0.999,
+                         'close': close, 'volume': rng.random(n) * 100 + 1}, index=index)
+
+def test_search_spaces():
+    """
+    Grid search covers the product; random search yields distinct combos.
+    """
+    space = {'adx_min': [15.0, 20.0], 'sl_atr': [1.0, 1.5, 2.0]}
+    assert len(list(sweep.grid_search(space))) == 6
+    sampled = list(sweep.random_search(space, 4, seed=1))
+    assert len(sampled) == 4
+    assert len({tuple(c.values()) for c in sampled}) == 4
+    assert len(list(sweep.random_search(space, 100))) == 6
+
+def test_shared_candles_round_trip():
+    """
+    Workers see the parent's candles through the shared block, unchanged.
+    """
+    candles = make_candles(500)
+    shm, layout = sweep.share_candles(candles)
+    try:
+        sweep._init_worker(layout)
+        assert sweep._candles.index.equals(candles.index)
+        assert np.array_equal(sweep._candles.to_numpy(), candles.to_numpy())
+    finally:
+        sweep._shm.close()
+        shm.close()
+        shm.unlink()
+
+def test_run_sweep_ranks_results(tmp_path):
+    """
+    Results stream to JSONL and come back ranked by the metric.
+    """
+    combos = [{'sl_atr': 1.0}, {'sl_atr': 1.5}, {'sl_atr': 2.0}]
+    out = tmp_path / "results.jsonl"
+    ranked = sweep.run_sweep(make_candles(), combos, workers=2, min_trades=0, out_path=str(out))
+    assert len(out.read_text().splitlines()) == 3
+    scores = [stats['total_pnl'] for _, stats in ranked]
+    assert scores == sorted(scores, reverse=True)
+
+if __name__ == "__main__":
+    import pathlib, tempfile
+    test_search_spaces()
+    test_shared_candles_round_trip()
+    test_run_sweep_ranks_results(pathlib.Path(tempfile.mkdtemp()))
+    print("sweep tests passed")
@@ -0,0 +1,72 @@
+import tempfile
+import candle_store
+from candle_store import CandleStore
+from testing_utils import synthetic_ohlcv
+from timescaledb_tools import columnar_history, fetch_indicator_history, history_query
+from trade_utils import compute_indicators
+
+SYMBOL = 'CORE/USDT:USDT'
+
+def test_history_query_shapes():
+    """
+    Last-N reads are one ordered, limited range scan; bucketed reads aggregate with
+    time_bucket inside a window bounded by the newest row.
+    """
+    sql, params = history_query(SYMBOL, "1m", ["rsi", "stoch_k"], bars=3)
+    assert sql.count("(indicators->>%s)::float8") == 2
+    assert "ORDER BY timestamp DESC LIMIT %s" in sql
+    assert params == ["rsi", "stoch_k", SYMBOL, "1m", 3]
+
+    sql, params = history_query(SYMBOL, "1m", ["rsi"], bars=12, bucket_ms=300000)
+    assert sql.startswith("SELECT time_bucket(%s::bigint, timestamp) AS bucket, last((indicators->>%s)::float8, timestamp)")
+    assert "GROUP BY bucket ORDER BY bucket DESC LIMIT %s" in sql
+    assert params == [300000, "rsi", SYMBOL, "1m", SYMBOL, "1m", 12 * 300000, 12]
+    assert sql.count("%s") == len(params)
+
+    sql, params = history_query(SYMBOL, "5m", ["adx"], start=1000, end=2000, bucket_ms=900000, agg="avg")
+    assert "avg((indicators->>%s)::float8)" in sql and "max(timestamp)" not in sql
+    assert params == [900000, "adx", SYMBOL, "5m", 1000, 2000]
+
+    for bad in ({"fields": ["rsi; DROP TABLE market_indicators"]}, {"fields": ["rsi"], "agg": "median"}):
+        try:
+            history_query(SYMBOL, "1m", **{"bars": 3, **bad})
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted {bad}")
+
+def test_columnar_history_quantizes_and_orders():
+    """
+    Columns come out oldest first at snapshot precision, with gaps as null.
+    """
+    history = columnar_history(SYMBOL, "1m", ["last_close", "rsi", "cci"], [1, 2],
+                               {"last_close": [0.51234567, 0.51300001], "rsi": [44.44, None],
+                                "cci": [-123.456789, 80.0]}, bucket_ms=300000, agg="last")
+    assert history['t'] == [1, 2] and history['bucket_min'] == 5 and history['agg'] == "last"
+    assert history['cols'] == {"last_close": [0.512346, 0.513], "rsi": [44.4, None], "cci": [-123.457, 80.0]}
+
+def test_recent_bars_come_from_the_local_ring():
+    """
+    With the candle store enabled, a plain last-N request is served from the ring without the DB.
+    """
+    ohlcv = synthetic_ohlcv()
+    with tempfile.TemporaryDirectory() as tmp:
+        original = candle_store.CANDLE_STORE_DIR
+        candle_store.CANDLE_STORE_DIR = tmp
+        try:
+            store = CandleStore.for_series(SYMBOL, "1m", create=True)
+            for i in range(60, 65):
+                store.write(ohlcv[i], compute_indicators(ohlcv[:i + 1]))
+            history = fetch_indicator_history(SYMBOL, "1m", ["stoch_k", "stoch_d"], bars=4)
+            store.close()
+        finally:
+            candle_store.CANDLE_STORE_DIR = original
+            candle_store._readers.clear()
+    assert history['t'] == [int(row[0]) for row in ohlcv[61:65]]
+    expected = round(compute_indicators(ohlcv[:65])['stoch_k'], 1)
+    assert history['cols']['stoch_k'][-1] == expected
+
+if __name__ == "__main__":
+    test_history_query_shapes()
+    test_columnar_history_quantizes_and_orders()
+    test_recent_bars_come_from_the_local_ring()
+    print("timescaledb tools tests passed")
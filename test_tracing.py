@@ -0,0 +1,44 @@
+import json
+import tracing
+
+def test_span_records_trace_and_histogram(tmp_path):
+    """
+    Spans land in the JSONL trace under the current trace ID and in the stage histogram.
+    """
+    previous = tracing.TRACE_FILE
+    tracing.TRACE_FILE = str(tmp_path / "traces.jsonl")
+    tracing._trace_file = None
+    trace_id = tracing.new_trace()
+    with tracing.span("unit_stage", symbol="CORE/USDT:USDT"):
+        pass
+    try:
+        with tracing.span("unit_stage"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    tracing._trace_file.close()
+    tracing._trace_file = None
+    records = [json.loads(line) for line in open(tracing.TRACE_FILE)]
+    tracing.TRACE_FILE = previous
+    assert [r['trace_id'] for r in records] == [trace_id, trace_id]
+    assert records[0]['symbol'] == "CORE/USDT:USDT"
+    assert records[1]['error'] == "ValueError: boom"
+
+    text = tracing.prometheus_text()
+    assert 'omnitrader_stage_latency_seconds_count{stage="unit_stage"} 2' in text
+    assert 'omnitrader_stage_latency_seconds_bucket{stage="unit_stage",le="+Inf"} 2' in text
+    tracing.write_prometheus(str(tmp_path / "omnitrader.prom"))
+    assert (tmp_path / "omnitrader.prom").read_text() == tracing.prometheus_text()
+
+def test_adopted_trace_id():
+    """
+    A trace started by the ETL can be adopted by the agent process.
+    """
+    assert tracing.new_trace("abc123") == "abc123"
+    assert tracing.current_trace_id() == "abc123"
+
+if __name__ == "__main__":
+    import pathlib, tempfile
+    test_span_records_trace_and_histogram(pathlib.Path(tempfile.mkdtemp()))
+    test_adopted_trace_id()
+    print("tracing tests passed")
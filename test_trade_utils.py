@@ -0,0 +1,77 @@
+import numpy as np
+import pandas_ta as ta
+from testing_utils import synthetic_ohlcv
+from trade_utils import (CONVERGENCE_TOLERANCE, INDICATOR_PARAMS as P, _column, compute_indicators, fetch_window,
+                         indicator_frame, MAX_FETCH_BARS, ohlcv_frame, warmup_bars)
+
+SKIPPED = {'obv'}  # Running total anchored at the window start
+
+def _error(got, ref, bars):
+    # Relative to the indicator's own scale (mean magnitude over the compared window), so
+    # near-zero series like MACD or slopes are held to the same standard as price levels
+    return abs(got - ref.iloc[-1]) / ref.iloc[-bars:].abs().mean()
+
+def _whole_window_vwap(rows):
+    # VWAP as the ETL computed it before the rolling window: over every fetched bar
+    _, _, high, low, close, volume = np.array(rows, dtype=float).T
+    return ((high + low + close) / 3 * volume).sum() / volume.sum()
+
+def test_vwap_covers_the_rolling_window_not_the_fetch():
+    """
+    The snapshot VWAP spans the last `vwap_window` bars, so it equals the old whole-window VWAP of a
+    100-bar fetch regardless of how many bars are fetched, and no longer the VWAP of the whole fetch.
+    """
+    rows = synthetic_ohlcv(fetch_window(), seed=11)
+    old = _whole_window_vwap(rows[-P['vwap_window']:])
+    assert abs(compute_indicators(rows)['vwap'] - old) < 1e-12
+    assert abs(compute_indicators(rows[-P['vwap_window']:])['vwap'] - old) < 1e-12
+    assert abs(_whole_window_vwap(rows) - old) > 1e-6
+
+def test_smoothed_indicators_converge_at_their_declared_warmup():
+    """
+    Each exponentially smoothed indicator, computed from exactly its declared warm-up, stays within
+    the tolerance of the same indicator computed over a long history.
+    """
+    series = {
+        'ema': lambda d: ta.ema(d['close'], length=P['ema_length']),
+        'rsi': lambda d: ta.rsi(d['close'], length=P['rsi_length']),
+        'atr': lambda d: ta.atr(d['high'], d['low'], d['close'], length=P['atr_length']),
+        'adx': lambda d: _column(ta.adx(d['high'], d['low'], d['close'], length=P['adx_length']), 'ADX_'),
+        'macd': lambda d: _column(ta.macd(d['close'], fast=P['macd_fast'], slow=P['macd_slow'],
+                                          signal=P['macd_signal']), 'MACDs_'),
+    }
+    warmup = warmup_bars()
+    for seed in range(10):
+        df = ohlcv_frame(synthetic_ohlcv(2000, seed=seed))
+        for name, indicator in series.items():
+            bars = warmup[name]
+            got = indicator(df.iloc[-bars:].reset_index(drop=True)).iloc[-1]
+            assert _error(got, indicator(df), bars) <= CONVERGENCE_TOLERANCE, (name, seed)
+
+def test_fetch_window_snapshot_matches_long_history():
+    """
+    A snapshot from the ETL's fetch window (minus the dropped forming candle) matches the long-history
+    values field by field, where the old fixed 100-bar fetch left MACD, RSI and ADX visibly off.
+    """
+    window = fetch_window() - 1
+    assert window == max(warmup_bars().values()) and fetch_window({'adx_length': 7}) < fetch_window()
+    assert fetch_window({'adx_length': 200}) == MAX_FETCH_BARS  # Capped, with a warning
+    off_at_100 = set()
+    for seed in range(5):
+        rows = synthetic_ohlcv(2000, seed=seed)
+        ref = indicator_frame(ohlcv_frame(rows))
+        got = compute_indicators(rows[-window:])
+        short = compute_indicators(rows[-100:])
+        for field, value in got.items():
+            if isinstance(value, float) and field in ref and field not in SKIPPED:
+                assert _error(value, ref[field], window) <= CONVERGENCE_TOLERANCE, (field, seed)
+                if _error(short[field], ref[field], window) > CONVERGENCE_TOLERANCE:
+                    off_at_100.add(field)
+        assert got['momentum'] == compute_indicators(rows)['momentum']
+    assert {'macd', 'macdsignal', 'rsi', 'adx'} <= off_at_100
+
+if __name__ == "__main__":
+    test_vwap_covers_the_rolling_window_not_the_fetch()
+    test_smoothed_indicators_converge_at_their_declared_warmup()
+    test_fetch_window_snapshot_matches_long_history()
+    print("trade utils tests passed")
@@ -0,0 +1,13 @@
+import numpy as np
+
+
+def synthetic_ohlcv(n=100, start=0.5123, seed=3):
+    """Deterministic 1m OHLCV rows (a lognormal random walk) for tests that need realistic candles."""
+    rng = np.random.default_rng(seed)
+    close = start * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    open_ = np.r_[start, close[:-1]]
+    high = np.maximum(open_, close) * 1.001
+    low = np.minimum(open_, close) * 0.999
+    volume = rng.uniform(1000, 5000, n)
+    return [[1_700_000_000_000 + i * 60_000, o, h, l, c, v]
+            for i, (o, h, l, c, v) in enumerate(zip(open_, high, low, close, volume))]
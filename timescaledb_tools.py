@@ -1,8 +1,15 @@
 import os
+import select
 import psycopg2
+import psycopg2.extensions
 import json
 from dotenv import load_dotenv
 from agents import function_tool
+from candle_clock import INDICATORS_CHANNEL
+from candle_store import INDICATOR_FIELDS, read_history, read_latest
+from indicator_schema import SCHEMA_VERSION, compact_indicators, compact_table, price_decimals, quantize
+from tracing import span
+from audit_log import audit, snapshot_hash
 
 load_dotenv()
 
@@ -12,23 +19,192 @@ def get_timescaledb_conn():
         raise ValueError("TIMESCALEDB_URL not set in environment.")
     return psycopg2.connect(db_url)
 
+# "compact" sends the short-key projection from indicator_schema to the model; "raw" the full document
+INDICATOR_PAYLOAD = os.getenv("INDICATOR_PAYLOAD", "compact")
+
+def normalize_timeframe(timeframe: str) -> str:
+    tf_map = {"1 m": "1m", "5 m": "5m", "15 m": "15m", "1m": "1m", "5m": "5m", "15m": "15m"}
+    return tf_map.get(timeframe.strip(), timeframe.replace(" ", ""))
+
+def fetch_latest_indicators(symbol: str, timeframes) -> dict:
+    """Latest indicator document per timeframe: from the local candle store when the ETL runs on this host, else one DB round trip."""
+    local = {tf: doc for tf in timeframes if (doc := read_latest(symbol, tf)) is not None}
+    missing = [tf for tf in timeframes if tf not in local]
+    if not missing:
+        return local
+    timeframes = missing
+    with span("db_read", symbol=symbol, timeframe=",".join(timeframes)):
+        conn = get_timescaledb_conn()
+        cur = conn.cursor()
+        cur.execute('''
+            SELECT DISTINCT ON (timeframe) timeframe, indicators FROM market_indicators
+            WHERE symbol = %s AND timeframe = ANY(%s)
+            ORDER BY timeframe, timestamp DESC
+        ''', (symbol, list(timeframes)))
+        rows = dict(cur.fetchall())  # jsonb arrives as dicts
+        cur.close()
+        conn.close()
+    local.update((tf, rows[tf]) for tf in timeframes if tf in rows)
+    return local
+
 @function_tool
 def get_latest_indicators(symbol: str, timeframe: str) -> dict:
     """Fetch the latest precomputed indicators for a symbol and timeframe from TimescaleDB."""
-    # Normalize timeframe input
-    tf_map = {"1 m": "1m", "5 m": "5m", "15 m": "15m", "1m": "1m", "5m": "5m", "15m": "15m"}
-    timeframe = tf_map.get(timeframe.strip(), timeframe.replace(" ", ""))
-    conn = get_timescaledb_conn()
-    cur = conn.cursor()
-    cur.execute('''
-        SELECT indicators FROM market_indicators
-        WHERE symbol = %s AND timeframe = %s
-        ORDER BY timestamp DESC LIMIT 1
-    ''', (symbol, timeframe))
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
-    if row:
-        return row[0]  # Already a dict if using psycopg2 with jsonb
-    else:
+    timeframe = normalize_timeframe(timeframe)
+    row = fetch_latest_indicators(symbol, [timeframe]).get(timeframe)
+    if row is None:
         return {"error": "No data found for this symbol/timeframe."}
+    payload = row if INDICATOR_PAYLOAD == "raw" else compact_indicators(row, timeframe)
+    audit("input", symbol, tool="get_latest_indicators", hash=snapshot_hash(payload), snapshot=payload)
+    return payload
+
+@function_tool
+def get_indicator_table(symbol: str, timeframes: list[str]) -> dict:
+    """Fetch the latest indicators for several timeframes as one compact table (one row per timeframe)."""
+    timeframes = [normalize_timeframe(tf) for tf in timeframes]
+    rows = fetch_latest_indicators(symbol, timeframes)
+    if not rows:
+        return {"error": "No data found for this symbol/timeframes."}
+    table = compact_table(rows, symbol)
+    missing = [tf for tf in timeframes if tf not in rows]
+    if missing:
+        table["missing"] = missing
+    audit("input", symbol, tool="get_indicator_table", hash=snapshot_hash(table), snapshot=table)
+    return table
+
+# Fields the history API can return: the numeric part of the indicator document
+HISTORY_FIELDS = INDICATOR_FIELDS
+MAX_HISTORY_BARS = 500
+# How each bucket is reduced; `last`/`first` are TimescaleDB's ordered aggregates
+HISTORY_AGGREGATES = {
+    'last': 'last({value}, timestamp)',
+    'first': 'first({value}, timestamp)',
+    'avg': 'avg({value})',
+    'min': 'min({value})',
+    'max': 'max({value})',
+}
+
+def history_query(symbol, timeframe, fields, bars=None, start=None, end=None, bucket_ms=None, agg='last'):
+    """
+    SQL and parameters for one range scan over the (symbol, timeframe, timestamp) primary key.
+    With `bucket_ms`, rows are downsampled in the database with time_bucket and `agg`.
+    Rows come back newest first; `bars` limits the number of rows (buckets).
+    """
+    unknown = [f for f in fields if f not in HISTORY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown indicator fields: {', '.join(unknown)}")
+    if agg not in HISTORY_AGGREGATES:
+        raise ValueError(f"Unknown aggregate: {agg}")
+    where = ["symbol = %s", "timeframe = %s"]
+    where_params = [symbol, timeframe]
+    if start is not None:
+        where.append("timestamp >= %s")
+        where_params.append(int(start))
+    if end is not None:
+        where.append("timestamp < %s")
+        where_params.append(int(end))
+    value = "(indicators->>%s)::float8"
+    if bucket_ms:
+        if bars and start is None:
+            # Bound the scan to the newest `bars` buckets instead of aggregating the whole series
+            where.append("timestamp > (SELECT max(timestamp) FROM market_indicators"
+                         " WHERE symbol = %s AND timeframe = %s) - %s")
+            where_params += [symbol, timeframe, int(bars * bucket_ms)]
+        columns = ", ".join(HISTORY_AGGREGATES[agg].format(value=value) for _ in fields)
+        sql = (f"SELECT time_bucket(%s::bigint, timestamp) AS bucket, {columns} FROM market_indicators "
+               f"WHERE {' AND '.join(where)} GROUP BY bucket ORDER BY bucket DESC")
+        params = [int(bucket_ms), *fields, *where_params]
+    else:
+        columns = ", ".join(value for _ in fields)
+        sql = f"SELECT timestamp, {columns} FROM market_indicators WHERE {' AND '.join(where)} ORDER BY timestamp DESC"
+        params = [*fields, *where_params]
+    if bars:
+        sql += " LIMIT %s"
+        params.append(int(bars))
+    return sql, params
+
+def columnar_history(symbol, timeframe, fields, timestamps, columns, bucket_ms=None, agg=None) -> dict:
+    """Oldest-first columns, quantized like the compact snapshot, e.g. {"t":[...],"cols":{"rsi":[...]}}."""
+    reference = next((v for v in reversed(columns.get('last_close', [])) if v is not None), None)
+    if reference is None:
+        reference = next((v for f in fields for v in reversed(columns[f]) if v is not None), None)
+    decimals = price_decimals(reference)
+    history = {'v': SCHEMA_VERSION, 'sym': symbol, 'tf': timeframe}
+    if bucket_ms:
+        history['bucket_min'] = bucket_ms // 60000
+        history['agg'] = agg
+    history['t'] = [int(t) for t in timestamps]
+    history['cols'] = {f: [quantize(f, v, decimals) if v is not None else None for v in columns[f]] for f in fields}
+    return history
+
+def fetch_indicator_history(symbol, timeframe, fields, bars=None, start=None, end=None, bucket_ms=None, agg='last'):
+    """Indicator history as columns, oldest first; plain last-N reads come from the local ring when it holds them."""
+    if bars and not (start or end or bucket_ms):
+        records = read_history(symbol, timeframe, bars)
+        if records is not None:
+            return columnar_history(symbol, timeframe, fields, records['ts'],
+                                    {f: records[f].tolist() for f in fields})
+    sql, params = history_query(symbol, timeframe, fields, bars, start, end, bucket_ms, agg)
+    with span("db_history", symbol=symbol, timeframe=timeframe, rows=bars):
+        conn = get_timescaledb_conn()
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        rows = cur.fetchall()[::-1]
+        cur.close()
+        conn.close()
+    columns = {f: [row[i + 1] for row in rows] for i, f in enumerate(fields)}
+    return columnar_history(symbol, timeframe, fields, [row[0] for row in rows], columns, bucket_ms, agg)
+
+@function_tool
+def get_indicator_history(symbol: str, timeframe: str, fields: list[str], bars: int, bucket_minutes: int) -> dict:
+    """
+    Last `bars` values (max 500) of selected indicator fields for one timeframe, oldest first, as columns.
+    bucket_minutes > 0 downsamples in the database to the last value per bucket; 0 returns every bar.
+    """
+    try:
+        history = fetch_indicator_history(
+            symbol, normalize_timeframe(timeframe), fields, max(1, min(bars, MAX_HISTORY_BARS)),
+            bucket_ms=bucket_minutes * 60000 if bucket_minutes > 0 else None)
+    except ValueError as e:
+        return {"error": str(e), "fields": HISTORY_FIELDS}
+    audit("input", symbol, tool="get_indicator_history", hash=snapshot_hash(history), snapshot=history)
+    return history
+
+class IndicatorListener:
+    """Blocks until the ETL NOTIFYs that fresh indicators are committed, instead of polling on a timer."""
+
+    def __init__(self, channel=INDICATORS_CHANNEL):
+        self.channel = channel
+        self.conn = None
+
+    def _connect(self):
+        self.conn = get_timescaledb_conn()
+        self.conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        cur = self.conn.cursor()
+        cur.execute(f"LISTEN {self.channel};")
+        cur.close()
+
+    def wait(self, timeout: float):
+        """Return the newest pending notification payload per symbol as a list of dicts (empty on timeout)."""
+        try:
+            if self.conn is None or self.conn.closed:
+                self._connect()
+            if not self.conn.notifies and select.select([self.conn], [], [], timeout) == ([], [], []):
+                return []
+            self.conn.poll()
+        except psycopg2.OperationalError:
+            # Drop the connection so the next wait reconnects and re-LISTENs
+            self.close()
+            raise
+        # Only each symbol's newest candle close matters; older backlog is already stale
+        latest = {}
+        for notify in self.conn.notifies:
+            event = json.loads(notify.payload)
+            latest[event.get("symbol")] = event
+        self.conn.notifies.clear()
+        return list(latest.values())
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,165 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Optional
+
+from agents import RunHooks
+
+# Per-span JSONL trace file; unset or empty disables it (nothing is written to the working directory by default)
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+# Latency histogram buckets in seconds (exchange calls and LLM turns span ms to tens of s)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRIC_NAME = "omnitrader_stage_latency_seconds"
+
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+_lock = threading.Lock()
+_histograms = {}
+_trace_file = None
+_sinks = []
+
+
+def new_trace(trace_id: Optional[str] = None) -> str:
+    """Start (or adopt) a trace ID for everything that runs in the current context."""
+    trace_id = trace_id or uuid.uuid4().hex[:16]
+    _trace_id.set(trace_id)
+    return trace_id
+
+
+def current_trace_id() -> Optional[str]:
+    return _trace_id.get()
+
+
+def _write(record: dict):
+    global _trace_file
+    if not TRACE_FILE:
+        return
+    line = json.dumps(record, default=str) + "\n"
+    with _lock:
+        if _trace_file is None:
+            _trace_file = open(TRACE_FILE, "a", buffering=1)
+        _trace_file.write(line)
+
+
+def add_sink(sink):
+    """Also send every observation to `sink(stage, seconds, attrs)`, e.g. a benchmark collecting raw samples."""
+    _sinks.append(sink)
+
+
+def remove_sink(sink):
+    _sinks.remove(sink)
+
+
+def record(stage: str, seconds: float, started_at: Optional[float] = None, error: Optional[str] = None, **attrs):
+    """Add one observation to the stage histogram and the trace file."""
+    with _lock:
+        hist = _histograms.setdefault(stage, {'counts': [0] * (len(BUCKETS) + 1), 'sum': 0.0, 'count': 0})
+        hist['counts'][bisect_left(BUCKETS, seconds)] += 1
+        hist['sum'] += seconds
+        hist['count'] += 1
+    for sink in _sinks:
+        sink(stage, seconds, attrs)
+    _write({
+        'trace_id': current_trace_id(),
+        'stage': stage,
+        'start': started_at if started_at is not None else time.time() - seconds,
+        'duration_ms': round(seconds * 1000, 3),
+        'error': error,
+        **attrs,
+    })
+
+
+@contextmanager
+def span(stage: str, **attrs):
+    """Time a block as `stage` under the current trace; exceptions are recorded and re-raised."""
+    started_at = time.time()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield attrs
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record(stage, time.perf_counter() - start, started_at=started_at, error=error, **attrs)
+
+
+def prometheus_text() -> str:
+    """All stage histograms in Prometheus text exposition format."""
+    lines = [f"# HELP {METRIC_NAME} Latency per pipeline stage.", f"# TYPE {METRIC_NAME} histogram"]
+    with _lock:
+        snapshot = {stage: (list(h['counts']), h['sum'], h['count']) for stage, h in _histograms.items()}
+    for stage, (counts, total, count) in sorted(snapshot.items()):
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS + (float('inf'),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float('inf') else repr(bound)
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+        lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {total}')
+        lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str):
+    """Atomically write metrics for the node_exporter textfile collector."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int) -> HTTPServer:
+    """Serve /metrics for Prometheus scraping from a daemon thread."""
+    server = HTTPServer(("", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    logging.info(f"Serving latency metrics on :{port}")
+    return server
+
+
+class LatencyRunHooks(RunHooks):
+    """Agent run hooks recording each LLM turn and tool call as a span of the current trace."""
+
+    def __init__(self):
+        self._started = {}
+
+    def _start(self, key):
+        self._started[key] = (time.time(), time.perf_counter())
+
+    def _end(self, key, stage, **attrs):
+        started = self._started.pop(key, None)
+        if started:
+            record(stage, time.perf_counter() - started[1], started_at=started[0], **attrs)
+
+    async def on_llm_start(self, context, agent, system_prompt, input_items):
+        self._start(("llm", agent.name))
+
+    async def on_llm_end(self, context, agent, response):
+        usage = getattr(response, 'usage', None)
+        self._end(("llm", agent.name), "llm_turn", agent=agent.name,
+                  input_tokens=getattr(usage, 'input_tokens', None),
+                  output_tokens=getattr(usage, 'output_tokens', None))
+
+    async def on_tool_start(self, context, agent, tool):
+        self._start(("tool", tool.name, getattr(context, 'tool_call_id', None)))
+
+    async def on_tool_end(self, context, agent, tool, result):
+        self._end(("tool", tool.name, getattr(context, 'tool_call_id', None)), "tool_call", tool=tool.name)